@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark das políticas de cache (sem rede, sem Flask)
+Mede o custo por operação de access/insert conforme o cache cresce
+"""
+
+import os
+import multiprocessing
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from cache.arc import ARCCache
+from cache.fifo import ClockCache, S3FIFOCache
+from cache.green import GreenCache
+from cache.journal import Journal
+from cache.lfu import LFUCache
+from cache.lru import LRUCache
+from cache.sharded import ShardedCache
+from cache.shm import SharedCache
+from cache.tinylfu import TinyLFU
+
+SIZES = [10, 1_000, 100_000, 1_000_000]
+OPS = 200_000
+
+
+def per_op_ns(fn, ops):
+    """Executa fn(i) ops vezes e devolve o custo médio em ns"""
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return (time.perf_counter() - start) / ops * 1e9
+
+
+def bench_lru():
+    """Custo de hit e de insert+evict do LRU de 10 a 1.000.000 entradas"""
+    print("\n" + "=" * 60)
+    print("LRU - custo por operação (deve ficar constante)")
+    print("=" * 60)
+    print(f"{'Entradas':>10} | {'hit (ns)':>10} | {'insert+evict (ns)':>18}")
+    print("-" * 60)
+    for n in SIZES:
+        c = LRUCache(n)
+        for k in range(n):
+            c.insert(k)
+        keys = [random.randrange(n) for _ in range(OPS)]
+        hit = per_op_ns(lambda i: c.access(keys[i]), OPS)
+        ins = per_op_ns(lambda i: c.insert(n + i), OPS)
+        print(f"{n:>10} | {hit:>10.0f} | {ins:>18.0f}")
+
+
+class LFUOriginal:
+    """LFU anterior (min() sobre todo o cache a cada eviction), só para comparação"""
+    def __init__(s,c): s.c=c; s.f=defaultdict(int)
+    def insert(s,k):
+        if k in s.f: s.f[k]+=1; return None
+        ev=None
+        if len(s.f)>=s.c: ev=min(s.f,key=s.f.get); del s.f[ev]
+        s.f[k]=1; return ev
+
+
+def bench_lfu():
+    """Custo de eviction: LFU original (varredura) vs LFU com baldes"""
+    print("\n" + "=" * 60)
+    print("LFU - custo por eviction (original vs baldes O(1))")
+    print("=" * 60)
+    print(f"{'Entradas':>10} | {'original (us)':>14} | {'baldes (us)':>12}")
+    print("-" * 60)
+    for n in [1_000, 100_000, 1_000_000]:
+        row = []
+        for cls in (LFUOriginal, LFUCache):
+            c = cls(n)
+            for k in range(n):
+                c.insert(k)
+            # a versão original é O(n): limita o número de evictions medidas
+            ev = 20_000 if cls is LFUCache else max(5, min(2_000, 20_000_000 // n))
+            row.append(per_op_ns(lambda i: c.insert(n + i), ev) / 1000)
+        print(f"{n:>10} | {row[0]:>14.1f} | {row[1]:>12.2f}")
+
+
+def bench_green():
+    """Custo de demanda e de insert+evict do GREEN (heap indexado, O(log n))"""
+    print("\n" + "=" * 60)
+    print("GREEN - custo por operação (cresce no máximo com log n)")
+    print("=" * 60)
+    print(f"{'Entradas':>10} | {'demanda (ns)':>12} | {'insert+evict (ns)':>18}")
+    print("-" * 60)
+    for n in SIZES:
+        c = GreenCache(n, 'Recife')
+        for k in range(n):
+            c.insert(k)
+        keys = [random.randrange(n) for _ in range(OPS)]
+        regions = [random.choice(['Recife', 'Caruaru']) for _ in range(OPS)]
+        dem = per_op_ns(lambda i: c.demand(keys[i], regions[i]), OPS)
+        ins = per_op_ns(lambda i: c.insert(n + i), OPS)
+        print(f"{n:>10} | {dem:>12.0f} | {ins:>18.0f}")
+
+
+def bench_tinylfu():
+    """Hit rate com 50% de varredura (crawler): política pura vs W-TinyLFU"""
+    print("\n" + "=" * 60)
+    print("W-TinyLFU - hit rate com varredura (cache de 1000, 800 quentes)")
+    print("=" * 60)
+    policies = {
+        'LRU': LRUCache,
+        'LFU': LFUCache,
+        'GREEN': lambda c: GreenCache(c, 'Recife'),
+    }
+    print(f"{'Política':>10} | {'pura':>8} | {'W-TinyLFU':>10}")
+    print("-" * 60)
+    for name, mk in policies.items():
+        row = []
+        for c in (mk(1000), TinyLFU(mk, 1000)):
+            rnd = random.Random(42)
+            hits = 0
+            for i in range(OPS):
+                k = rnd.randrange(800) if rnd.random() < 0.5 else f"scan{i}"
+                if c.access(k):
+                    hits += 1
+                else:
+                    c.insert(k)
+            row.append(hits / OPS * 100)
+        print(f"{name:>10} | {row[0]:>7.1f}% | {row[1]:>9.1f}%")
+
+
+def bench_arc():
+    """Hit rate numa carga que muda de padrão: LRU vs LFU vs ARC"""
+    print("\n" + "=" * 60)
+    print("ARC - hit rate com mudança de padrão (cache de 100)")
+    print("=" * 60)
+    rnd = random.Random(7)
+    phases = {
+        'laço 120': [i % 120 for i in range(OPS // 4)],
+        'zipf': [int(rnd.paretovariate(1.0)) % 5000 for _ in range(OPS // 4)],
+        'zipf+varredura': [int(rnd.paretovariate(0.8)) % 3000 if rnd.random() < 0.7
+                           else f"scan{i}" for i in range(OPS // 4)],
+        'novo laço 90': [f"n{i % 90}" for i in range(OPS // 4)],
+    }
+    caches = {'LRU': LRUCache(100), 'LFU': LFUCache(100), 'ARC': ARCCache(100)}
+    print(f"{'Fase':>16} | " + " | ".join(f"{n:>6}" for n in caches))
+    print("-" * 60)
+    for phase, seq in phases.items():
+        row = []
+        for c in caches.values():
+            hits = 0
+            for k in seq:
+                if c.access(k):
+                    hits += 1
+                else:
+                    c.insert(k)
+            row.append(hits / len(seq) * 100)
+        print(f"{phase:>16} | " + " | ".join(f"{h:>5.1f}%" for h in row))
+
+
+def bench_threads():
+    """Vazão de acertos com muitas threads: LRU vs CLOCK vs S3-FIFO
+
+    'política' chama a política crua; 'peer' é o caminho de um acerto no peer
+    (ShardedCache com 1 shard, o padrão, e o diário ligado: lock + registro no buffer)
+    """
+    print("\n" + "=" * 60)
+    print("Acertos concorrentes (100.000 entradas) - milhares de ops/s")
+    print("=" * 60)
+    n = 100_000
+    counts = [1, 8, 64]
+    print(f"{'Política':>10} | {'caminho':>8} | " + " | ".join(f"{t:>3} thr" for t in counts))
+    print("-" * 60)
+    for name, mk in (('LRU', LRUCache), ('CLOCK', ClockCache), ('S3-FIFO', S3FIFOCache)):
+        d = tempfile.mkdtemp()
+        try:
+            j = Journal(d, lambda: ShardedCache(mk, n, 1), name)
+            for path, c in (('política', mk(n)), ('peer', j)):
+                for k in range(n):
+                    c.insert(f'video{k}.mp4')
+                row = []
+                for t in counts:
+                    keys = [f'video{random.randrange(n)}.mp4' for _ in range(OPS // t)]
+
+                    def work():
+                        for k in keys:
+                            c.access(k)
+
+                    threads = [threading.Thread(target=work) for _ in range(t)]
+                    start = time.perf_counter()
+                    for th in threads:
+                        th.start()
+                    for th in threads:
+                        th.join()
+                    row.append(len(keys) * t / (time.perf_counter() - start) / 1000)
+                print(f"{name:>10} | {path:>8} | " + " | ".join(f"{r:>7.0f}" for r in row))
+            j.close()
+        finally:
+            shutil.rmtree(d)
+
+
+def bench_hammer():
+    """64 threads misturando acertos e inserções com tamanhos variados"""
+    print("\n" + "=" * 60)
+    print("Hammer - 64 threads, orçamento global de 1.000.000 bytes")
+    print("=" * 60)
+    print(f"{'Política':>10} | {'shards':>6} | {'mil ops/s':>10} | {'bytes usados':>12}")
+    print("-" * 60)
+    for name, mk in (('LRU', LRUCache), ('LFU', LFUCache), ('S3-FIFO', S3FIFOCache)):
+        for shards in (1, 16):
+            c = ShardedCache(mk, 1_000_000, shards)
+            errors = []
+
+            def work(seed):
+                rnd = random.Random(seed)
+                try:
+                    for _ in range(OPS // 64):
+                        k = rnd.randrange(50_000)
+                        if not c.access(k):
+                            c.insert(k, k % 1000 + 1)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=work, args=(i,)) for i in range(64)]
+            start = time.perf_counter()
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+            rate = OPS / (time.perf_counter() - start) / 1000
+            used = sum(p.u for p in c.sh)
+            assert not errors, errors[0]
+            assert used == c.u <= c.c, (used, c.u)
+            print(f"{name:>10} | {shards:>6} | {rate:>10.0f} | {used:>12}")
+
+
+def bench_restore():
+    """Snapshot e partida (snapshot + diário) de uma política com 1.000.000 entradas
+
+    'partida' lê só o snapshot; '+ diário' reaplica também o diário mais longo
+    que a thread do Journal deixa acumular (Journal.MAXN acertos depois do snapshot)
+    """
+    print("\n" + "=" * 116)
+    print("Restore - metadados persistidos, 1.000.000 entradas")
+    print("=" * 116)
+    print(f"{'Política':>10} | {'shards':>6} | {'snapshot (s)':>12} | {'MB':>5} | {'partida (s)':>11} | "
+          f"{'+ diário (s)':>12} | {'acerto (ns)':>11} | {'pior acerto no snapshot (ms)':>28}")
+    print("-" * 116)
+    n = 1_000_000
+    events = Journal.MAXN
+    for name, mk in (('LRU', LRUCache), ('LFU', LFUCache), ('GREEN', lambda c: GreenCache(c, 'Recife'))):
+        for shards in (1, 16):
+            d = tempfile.mkdtemp()
+            try:
+                def reopen():
+                    start = time.perf_counter()
+                    j = Journal(d, lambda: ShardedCache(mk, n, shards), name)
+                    return j, time.perf_counter() - start
+
+                j, _ = reopen()
+                on, j.p.on = j.p.on, None  # carga inicial fora do diário
+                for k in range(n):
+                    j.p.insert(f'video{k}.mp4')
+                j.p.on = on
+                worst = [0.0]
+                done = threading.Event()
+
+                def hits():
+                    # acertos concorrentes: o maior tempo de um acerto é a pausa vista pelo cliente
+                    while not done.is_set():
+                        t0 = time.perf_counter()
+                        j.access(f'video{random.randrange(n)}.mp4')
+                        worst[0] = max(worst[0], time.perf_counter() - t0)
+
+                th = threading.Thread(target=hits)
+                th.start()
+                start = time.perf_counter()
+                j.snapshot()
+                snap = time.perf_counter() - start
+                done.set()
+                th.join()
+                mb = os.path.getsize(j.sp) / 1e6
+                j.close()
+                j, load = reopen()
+                assert len(j) == n
+                keys = [f'video{random.randrange(n)}.mp4' for _ in range(OPS)]
+                hit = per_op_ns(lambda i: j.access(keys[i]), OPS)
+                for i in range(events - OPS):
+                    j.access(keys[i % OPS])
+                j.close()
+                j, replay = reopen()
+                assert len(j) == n
+                j.close()
+            finally:
+                shutil.rmtree(d)
+            print(f"{name:>10} | {shards:>6} | {snap:>12.2f} | {mb:>5.0f} | {load:>11.2f} | {replay:>12.2f} | "
+                  f"{hit:>11.0f} | {worst[0] * 1000:>28.1f}")
+
+
+def bench_shared():
+    """Vários processos sobre uma só tabela em memória compartilhada (modo WORKERS)"""
+    print("\n" + "=" * 60)
+    print(f"Tabela compartilhada - orçamento de 1.000.000 bytes ({os.cpu_count()} CPUs)")
+    print("=" * 60)
+    print(f"{'Política':>10} | " + " | ".join(f"{p:>3} proc" for p in (1, 2, 4)) + "  (mil ops/s)")
+    print("-" * 60)
+    ctx = multiprocessing.get_context('fork')
+    for name in ('LRU', 'LFU', 'GREEN'):
+        row = []
+        for procs in (1, 2, 4):
+            c = SharedCache(1_000_000, name, 'Recife', 1 << 17)
+
+            def work(seed):
+                rnd = random.Random(seed)
+                for _ in range(OPS // 4 // procs):
+                    k = f'video{rnd.randrange(50_000)}.mp4'
+                    if not c.access(k):
+                        c.insert(k, rnd.randrange(1, 1000))
+
+            ps = [ctx.Process(target=work, args=(i,)) for i in range(procs)]
+            start = time.perf_counter()
+            for p in ps:
+                p.start()
+            for p in ps:
+                p.join()
+            row.append(OPS // 4 // procs * procs / (time.perf_counter() - start) / 1000)
+            assert c.u <= c.c, (c.u, c.c)
+        print(f"{name:>10} | " + " | ".join(f"{r:>8.0f}" for r in row))
+
+BENCHES = {
+    'lru': bench_lru,
+    'lfu': bench_lfu,
+    'green': bench_green,
+    'tinylfu': bench_tinylfu,
+    'arc': bench_arc,
+    'threads': bench_threads,
+    'hammer': bench_hammer,
+    'restore': bench_restore,
+    'shared': bench_shared,
+}
+
+
+def main():
+    chosen = sys.argv[1:] or list(BENCHES)
+    for name in chosen:
+        BENCHES[name]()
+
+
+if __name__ == "__main__":
+    main()
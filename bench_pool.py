@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pool de conexões entre peers contra o app de verdade
+Sobe duas cópias de peer2/app.py (sem vizinhos) que respondem 504 a cada
+sondagem only-if-cached, como numa rodada de misses; compara requests.get
+solto com PeerSessions (keep-alive) com o servidor do werkzeug puro
+(Connection: close), com o KeepAliveHandler dos peers e com ASYNC=True
+Sockets: conexões abertas de fato (connect) contadas pelo PeerSessions;
+requests.get abre uma por pedido
+"""
+
+import os
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from p2p.sessions import PeerSessions
+
+MISSES = 1_000
+CLIENTS = [1, 8]
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MODES = {
+    'werkzeug': [('app.run(port=PORT,request_handler=KeepAliveHandler)', 'app.run(port=PORT)')],
+    'keep-alive': [],
+    'ASYNC': [(re.compile(r'^ASYNC=False', re.M), 'ASYNC=True')],
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn(mode, name):
+    """Cópia de peer2/app.py num diretório temporário ao lado dos peers (a origem é ../origin/files)"""
+    d = tempfile.mkdtemp(prefix='bench_', dir=ROOT)
+    port = free_port()
+    src = open(os.path.join(ROOT, 'peer2', 'app.py')).read()
+    subs = [(re.compile(r"^PEER_NAME=.*", re.M), f"PEER_NAME='{name}'"), (re.compile(r"^PORT=.*", re.M), f'PORT={port}'),
+            (re.compile(r"^PEERS=.*", re.M), 'PEERS={}'), (re.compile(r"^PERSIST=True", re.M), 'PERSIST=False')] + MODES[mode]
+    for a, b in subs:
+        src, n = a.subn(b, src) if hasattr(a, 'subn') else (src.replace(a, b), src.count(a))
+        assert n == 1, a
+    open(os.path.join(d, 'app.py'), 'w').write(src)
+    proc = subprocess.Popen([sys.executable, 'app.py'], cwd=d, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            requests.get(url + '/health', timeout=1)
+            return proc, d, url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f'{name} ({mode}) não subiu')
+
+
+def run(get, peers, clients):
+    """MISSES misses, cada um sondando todos os vizinhos em paralelo"""
+    probes = ThreadPoolExecutor(max_workers=4 * len(peers))
+    lat = []
+
+    def miss(i):
+        t0 = time.perf_counter()
+        for fu in [probes.submit(get, p, f'/file/video{i}.txt') for p in peers]:
+            assert fu.result().status_code == 504
+        lat.append((time.perf_counter() - t0) * 1000)
+
+    with ThreadPoolExecutor(max_workers=clients) as ex:
+        list(ex.map(miss, range(MISSES)))
+    probes.shutdown()
+    lat.sort()
+    return statistics.mean(lat), lat[int(len(lat) * 0.95)]
+
+
+def main():
+    h = {'Cache-Control': 'only-if-cached'}
+    print("=" * 78)
+    print(f"Misses com sondagem a 2 peers reais ({MISSES} misses)")
+    print("=" * 78)
+    print(f"{'Servidor':>10} | {'Cliente':>12} | {'clientes':>8} | {'média (ms)':>10} | {'p95 (ms)':>8} | {'sockets':>7}")
+    print("-" * 78)
+    for mode in MODES:
+        up = [spawn(mode, name) for name in ('peer2', 'peer3')]
+        peers = {name: url for name, (_, _, url) in zip(('peer2', 'peer3'), up)}
+        try:
+            for clients in CLIENTS:
+                mean, p95 = run(lambda p, path: requests.get(peers[p] + path, headers=h, timeout=10), peers, clients)
+                print(f"{mode:>10} | {'requests.get':>12} | {clients:>8} | {mean:>10.2f} | {p95:>8.2f} | {MISSES * len(peers):>7}")
+                conns = PeerSessions(peers, 8)
+                mean, p95 = run(lambda p, path: conns.get(p, path, headers=h, timeout=10), peers, clients)
+                st = conns.stats()
+                opened = sum(v['conexoes_abertas'] for v in st.values())
+                print(f"{mode:>10} | {'PeerSessions':>12} | {clients:>8} | {mean:>10.2f} | {p95:>8.2f} | {opened:>7}")
+                for ss in conns.ss.values():
+                    ss.close()
+        finally:
+            for proc, d, _ in up:
+                proc.terminate()
+                proc.wait()
+                shutil.rmtree(d, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
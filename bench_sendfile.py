@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark do caminho de acerto no disco (Flask + servidor do werkzeug)
+Serve o mesmo arquivo com send_file puro (blocos de 8 KB copiados pelo Python)
+e com o middleware zerocopy (os.sendfile); objetos de 1 MB e 1 GB
+Mede a vazão vista pelo cliente e a CPU gasta pelo servidor por GB servido
+"""
+
+import http.client
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from flask import Flask, send_file
+from werkzeug.serving import make_server
+
+from cache.zerocopy import zerocopy
+
+OBJECTS = [('1MB', 1024**2, 300), ('1GB', 1024**3, 3)]
+
+
+def server(d, zc, port):
+    app = Flask(__name__)
+
+    @app.route('/file/<f>')
+    def getf(f):
+        return send_file(os.path.join(d, f))
+
+    @app.route('/cpu')
+    def cpu():
+        return str(time.process_time())
+
+    if zc:
+        app.wsgi_app = zerocopy(app.wsgi_app)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    srv = make_server('127.0.0.1', 0, app, threaded=True)
+    port.put(srv.server_port)
+    srv.serve_forever()
+
+
+def get(port, path, buf):
+    """GET descartando o corpo num buffer fixo; devolve os bytes lidos"""
+    c = http.client.HTTPConnection('127.0.0.1', port)
+    c.request('GET', path)
+    r = c.getresponse()
+    n = 0
+    while k := r.readinto(buf):
+        n += k
+    c.close()
+    return n
+
+
+def cpu(port):
+    return float(get_text(port, '/cpu'))
+
+
+def get_text(port, path):
+    c = http.client.HTTPConnection('127.0.0.1', port)
+    c.request('GET', path)
+    t = c.getresponse().read().decode()
+    c.close()
+    return t
+
+
+def main():
+    d = tempfile.mkdtemp()
+    try:
+        block = os.urandom(1024**2)
+        for name, size, _ in OBJECTS:
+            with open(os.path.join(d, name), 'wb') as fh:
+                for _ in range(size // len(block)):
+                    fh.write(block)
+        ctx = multiprocessing.get_context('fork')
+        ports = {}
+        procs = []
+        for mode, zc in (('send_file', False), ('sendfile', True)):
+            q = ctx.Queue()
+            p = ctx.Process(target=server, args=(d, zc, q), daemon=True)
+            p.start()
+            procs.append(p)
+            ports[mode] = q.get()
+        buf = memoryview(bytearray(1024**2))
+        print("=" * 68)
+        print(f"Acertos no disco, 1 cliente ({os.cpu_count()} CPUs)")
+        print("=" * 68)
+        print(f"{'Objeto':>6} | {'Modo':>9} | {'pedidos':>7} | {'MB/s':>7} | {'CPU servidor (s/GB)':>19}")
+        print("-" * 68)
+        for name, size, reqs in OBJECTS:
+            for mode, port in ports.items():
+                get(port, f'/file/{name}', buf)  # page cache quente
+                c0 = cpu(port)
+                start = time.perf_counter()
+                for _ in range(reqs):
+                    assert get(port, f'/file/{name}', buf) == size
+                took = time.perf_counter() - start
+                gb = size * reqs / 1024**3
+                spent = cpu(port) - c0
+                print(f"{name:>6} | {mode:>9} | {reqs:>7} | {size * reqs / took / 1e6:>7.0f} | {spent / gb:>19.2f}")
+        for p in procs:
+            p.terminate()
+    finally:
+        shutil.rmtree(d)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+class ARCCache:
+    # ARC (Adaptive Replacement Cache): t1 = visto uma vez (recencia), t2 = visto
+    # mais de uma vez (frequencia); b1/b2 = fantasmas (so chaves) de quem saiu de t1/t2
+    # acerto num fantasma de b1 mostra que faltou espaco para recencia -> p cresce;
+    # acerto em b2 -> p diminui. p = alvo de capacidade de t1, ajustado sozinho
+    # conforme o padrao de trafego muda, sem trocar POLICY
+    # capacidade em unidades de tamanho: sz=1 conta objetos, sz=bytes conta bytes
+    def __init__(s,c):
+        s.c=c; s.p=0; s.t1=OrderedDict(); s.t2=OrderedDict(); s.b1=OrderedDict(); s.b2=OrderedDict()
+        s.u1=s.u2=s.g1=s.g2=0  # bytes em t1, t2, b1, b2
+    @property
+    def u(s): return s.u1+s.u2
+    def __len__(s): return len(s.t1)+len(s.t2)
+    def __contains__(s,k): return k in s.t1 or k in s.t2
+    def _t1(s,b2=False): return s.t1 and (not s.t2 or s.u1>s.p or (b2 and s.u1==s.p))
+    def victim(s):
+        if s._t1(): return next(iter(s.t1))
+        return next(iter(s.t2),None)
+    def _fit(s,n,b2=False):
+        evs=[]
+        while (s.t1 or s.t2) and s.u+n>s.c:
+            if s._t1(b2): k,z=s.t1.popitem(last=False); s.u1-=z; s.b1[k]=z; s.g1+=z
+            else: k,z=s.t2.popitem(last=False); s.u2-=z; s.b2[k]=z; s.g2+=z
+            evs.append(k)
+        return evs
+    def _trim(s,evs):
+        # fantasmas limitados: |t1|+|b1| <= c e o total <= 2c
+        while s.b1 and s.u1+s.g1>s.c: s.g1-=s.b1.popitem(last=False)[1]
+        while s.b2 and s.u+s.g1+s.g2>2*s.c: s.g2-=s.b2.popitem(last=False)[1]
+        return evs
+    def evict(s,n): return s._fit(s.c-s.u+n)  # libera pelo menos n unidades
+    def keys(s): return list(s.t1)+list(s.t2)
+    def remove(s,k):
+        # sai sem virar fantasma: nao foi expulso por falta de espaco
+        if k in s.t1: s.u1-=s.t1.pop(k); return True
+        if k in s.t2: s.u2-=s.t2.pop(k); return True
+        return False
+    def access(s,k):
+        if k in s.t1: z=s.t1.pop(k); s.u1-=z; s.t2[k]=z; s.u2+=z; return True
+        if k in s.t2: s.t2.move_to_end(k); return True
+        return False
+    def insert(s,k,sz=1):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        if s.access(k): s.u2+=sz-s.t2[k]; s.t2[k]=sz; return s._trim(s._fit(0))
+        if sz>s.c: return [k]
+        b2=False
+        if k in s.b1:
+            s.p=min(s.c,s.p+sz*max(1,s.g2/max(s.g1,1))); s.g1-=s.b1.pop(k)
+        elif k in s.b2:
+            s.p=max(0,s.p-sz*max(1,s.g1/max(s.g2,1))); s.g2-=s.b2.pop(k); b2=True
+        else:
+            evs=s._fit(sz); s.t1[k]=sz; s.u1+=sz; return s._trim(evs)
+        evs=s._fit(sz,b2); s.t2[k]=sz; s.u2+=sz; return s._trim(evs)
@@ -0,0 +1,51 @@
+import hashlib, mmap, multiprocessing, threading
+# digests de cache (filtro de Bloom) trocados entre peers: m bits, k hashes
+# 8 bits por chave e k=6 -> ~1 KB por 1.000 objetos e ~2% de falso positivo
+# (com mais chaves que o previsto o falso positivo sobe rapido: 2x -> ~15%)
+# hash estavel (blake2b) para que peers diferentes calculem os mesmos bits
+def _idx(key,m,k):
+    d=hashlib.blake2b(key.encode(),digest_size=16).digest()
+    h=int.from_bytes(d[:8],'little'); g=int.from_bytes(d[8:],'little')|1
+    return [(h+i*g)%m for i in range(k)]
+class Digest:
+    # digest recebido de um vizinho (somente leitura)
+    def __init__(s,bits,k=6): s.b=bits; s.m=len(bits)*8; s.k=k
+    def __contains__(s,key): return all(s.b[i>>3]>>(i&7)&1 for i in _idx(key,s.m,s.k))
+class CountingDigest:
+    # digest local: Bloom com contadores de 1 byte para aceitar remocao no evict;
+    # bits() exporta so os bits (contador>0) para os vizinhos
+    # shared=True: contadores num mmap anonimo com lock de processo, vistos por
+    # todos os workers criados por fork depois daqui
+    # n = chaves previstas; grow() dobra a tabela quando passam disso
+    def __init__(s,n=1000,k=6,shared=False):
+        s.m=8*max(n,1); s.k=k; s.n=0; s.shared=shared
+        s.c,s.lk=(mmap.mmap(-1,s.m),multiprocessing.Lock()) if shared else (bytearray(s.m),threading.Lock())
+    def add(s,key):
+        with s.lk:
+            s.n+=1
+            for i in _idx(key,s.m,s.k):
+                if s.c[i]<255: s.c[i]+=1
+    def remove(s,key):
+        with s.lk:
+            s.n-=1
+            for i in _idx(key,s.m,s.k):
+                if 0<s.c[i]<255: s.c[i]-=1  # saturado fica (nao sabemos quantos)
+    def grow(s,keys):
+        # mais chaves que bits/8: refaz os contadores com o dobro do tamanho a partir
+        # de keys() (as chaves atuais, lidas sob o lock); compartilhado so antes do
+        # fork, depois os workers ficariam com mmaps diferentes
+        if s.n<=s.m//8: return False
+        with s.lk:
+            ks=keys(); m=max(2*s.m,16*len(ks)); c=mmap.mmap(-1,m) if s.shared else bytearray(m)
+            for key in ks:
+                for i in _idx(key,m,s.k):
+                    if c[i]<255: c[i]+=1
+            s.c=c; s.m=m; s.n=len(ks)  # c antes de m: quem le m novo ja ve c novo
+        return True
+    def __contains__(s,key): return all(s.c[i] for i in _idx(key,s.m,s.k))
+    def bits(s):
+        b=bytearray(s.m//8)
+        with s.lk:
+            for i,v in enumerate(s.c[:]):  # fatia: iterar um mmap da bytes de 1, sempre verdadeiros
+                if v: b[i>>3]|=1<<(i&7)
+        return bytes(b)
@@ -0,0 +1,134 @@
+from collections import OrderedDict, deque
+# politicas da familia FIFO: o acerto so marca um bit/contador num array
+# pre-alocado (s.r / s.f, indexado pelo slot da chave), sem reordenar estruturas
+# e sem alocar nada; todo o trabalho fica na insercao/eviction
+# capacidade em unidades de tamanho: sz=1 conta objetos, sz=bytes conta bytes
+# n = slots pre-alocados (crescem se preciso, ex.: muitos objetos pequenos em modo bytes)
+class ClockCache:
+    # CLOCK: anel de slots com bit de referencia; o ponteiro s.h limpa bits
+    # ate achar um slot com bit 0 (segunda chance), que vira a vitima
+    def __init__(s,c,n=None):
+        n=min(c,1<<16) if n is None else n
+        s.c=c; s.u=0; s.ix={}; s.k=[None]*n; s.z=[0]*n; s.r=bytearray(n); s.fr=list(range(n-1,-1,-1)); s.h=0
+    def __len__(s): return len(s.ix)
+    def __contains__(s,k): return k in s.ix
+    def _slot(s):
+        if s.fr: return s.fr.pop()
+        s.k.append(None); s.z.append(0); s.r.append(0); return len(s.k)-1
+    def _hand(s):
+        while True:
+            h=s.h; s.h=(h+1)%len(s.k)
+            if s.k[h] is None: continue
+            if s.r[h]: s.r[h]=0; continue
+            return h
+    def victim(s):
+        if not s.ix: return None
+        h=s.h
+        for _ in range(2*len(s.k)):
+            if s.k[h] is not None and not s.r[h]: return s.k[h]
+            h=(h+1)%len(s.k)
+        return s.k[s.h]
+    def _fit(s,n):
+        evs=[]
+        while s.ix and s.u+n>s.c:
+            h=s._hand(); k=s.k[h]; del s.ix[k]; s.k[h]=None; s.u-=s.z[h]; s.fr.append(h); evs.append(k)
+        return evs
+    def evict(s,n): return s._fit(s.c-s.u+n)  # libera pelo menos n unidades
+    def keys(s): return list(s.ix)
+    def remove(s,k):
+        i=s.ix.pop(k,None)
+        if i is None: return False
+        s.k[i]=None; s.u-=s.z[i]; s.fr.append(i); return True
+    def access(s,k):
+        i=s.ix.get(k)
+        if i is None: return False
+        s.r[i]=1; return True
+    def insert(s,k,sz=1):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        i=s.ix.get(k)
+        if i is not None: s.r[i]=1; s.u+=sz-s.z[i]; s.z[i]=sz; return s._fit(0)
+        if sz>s.c: return [k]
+        evs=s._fit(sz); i=s._slot()
+        s.ix[k]=i; s.k[i]=k; s.z[i]=sz; s.r[i]=0; s.u+=sz; return evs
+class S3FIFOCache:
+    # S3-FIFO: fila pequena S (sp da capacidade) filtra quem so aparece uma vez,
+    # fila principal M guarda o resto, fantasma G (so chaves) lembra quem saiu de S
+    # acerto: contador de 2 bits s.f[slot] (satura em 3)
+    # saindo de S: f>1 -> vai para M, senao vitima (e entra em G)
+    # saindo de M: f>0 -> f-=1 e volta para o fim de M, senao vitima
+    # chave que volta estando em G entra direto em M
+    # remove() e O(1): so marca a chave em dS/dM (entradas mortas por fila) e a
+    # entrada sai quando chegar na frente da fila
+    def __init__(s,c,n=None,sp=0.1):
+        n=min(c,1<<16) if n is None else n
+        s.c=c; s.sp=sp; s.us=s.um=s.ug=0; s.ix={}; s.k=[None]*n; s.z=[0]*n
+        s.f=bytearray(n); s.m=bytearray(n); s.fr=list(range(n-1,-1,-1))
+        s.S=deque(); s.M=deque(); s.G=OrderedDict(); s.dS={}; s.dM={}
+    @property
+    def u(s): return s.us+s.um
+    def __len__(s): return len(s.ix)
+    def __contains__(s,k): return k in s.ix
+    def _slot(s):
+        if s.fr: return s.fr.pop()
+        s.k.append(None); s.z.append(0); s.f.append(0); s.m.append(0); return len(s.k)-1
+    def _live(s):
+        # descarta da frente das filas as entradas de chaves removidas (a entrada
+        # morta de k numa fila e sempre anterior a qualquer entrada viva de k nela)
+        for q,d in ((s.S,s.dS),(s.M,s.dM)):
+            while q and q[0] in d:
+                k=q.popleft(); d[k]-=1
+                if not d[k]: del d[k]
+    def _small(s): return s.S and (s.us>=s.c*s.sp or not s.M)
+    def victim(s):
+        s._live(); q=s.S if s._small() else s.M
+        return q[0] if q else None
+    def _free(s,k):
+        i=s.ix.pop(k); s.k[i]=None; s.fr.append(i); return i
+    def _evict(s):
+        # uma rodada de eviction; devolve a chave removida ou None se so moveu
+        s._live()
+        if s._small():
+            k=s.S.popleft(); i=s.ix[k]; z=s.z[i]; s.us-=z
+            if s.f[i]>1: s.M.append(k); s.m[i]=1; s.f[i]=0; s.um+=z; return None
+            s._free(k); s.G[k]=z; s.ug+=z
+            while s.ug>s.c: s.ug-=s.G.popitem(last=False)[1]
+            return k
+        k=s.M.popleft(); i=s.ix[k]
+        if s.f[i]: s.f[i]-=1; s.M.append(k); return None
+        s.um-=s.z[i]; s._free(k); return k
+    def _fit(s,n):
+        evs=[]
+        while s.ix and s.u+n>s.c:
+            k=s._evict()
+            if k is not None: evs.append(k)
+        return evs
+    def evict(s,n): return s._fit(s.c-s.u+n)  # libera pelo menos n unidades
+    def keys(s): return list(s.ix)
+    def remove(s,k):
+        i=s.ix.get(k)
+        if i is None: return False
+        d=s.dM if s.m[i] else s.dS; d[k]=d.get(k,0)+1
+        if s.m[i]: s.um-=s.z[i]
+        else: s.us-=s.z[i]
+        s._free(k); return True
+    def access(s,k):
+        i=s.ix.get(k)
+        if i is None: return False
+        if s.f[i]<3: s.f[i]+=1
+        return True
+    def insert(s,k,sz=1):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        i=s.ix.get(k)
+        if i is not None:
+            if s.f[i]<3: s.f[i]+=1
+            if s.m[i]: s.um+=sz-s.z[i]
+            else: s.us+=sz-s.z[i]
+            s.z[i]=sz; return s._fit(0)
+        if sz>s.c: return [k]
+        g=k in s.G
+        if g: s.ug-=s.G.pop(k)
+        evs=s._fit(sz); i=s._slot()
+        s.ix[k]=i; s.k[i]=k; s.z[i]=sz; s.f[i]=0; s.m[i]=g
+        if g: s.M.append(k); s.um+=sz
+        else: s.S.append(k); s.us+=sz
+        return evs
@@ -0,0 +1,103 @@
+import asyncio, os, threading, uuid
+CHUNK=64*1024
+PART='.parcial'  # sufixo dos arquivos ainda sendo gravados
+def tmpname(path): return path+'.'+uuid.uuid4().hex+PART
+def recover(d):
+    # varredura na partida: apaga preenchimentos interrompidos (crash no meio da
+    # gravacao) e devolve os arquivos completos (nome, bytes), mais antigos primeiro
+    ok=[]
+    for e in os.scandir(d):
+        if not e.is_file(): continue
+        if e.name.endswith(PART): os.remove(e.path); continue
+        st=e.stat(); ok.append((st.st_mtime,e.name,st.st_size))
+    return [(n,z) for _,n,z in sorted(ok)]
+class Fill:
+    # preenchimento em andamento (tee para o disco): um escritor grava chunks em
+    # tmp enquanto leitores acompanham o mesmo arquivo, cada um com seu handle;
+    # memoria por pedido = alguns chunks, e o primeiro byte sai antes do fim da busca
+    # commit(final) renomeia tmp para o nome do cache (atomico: quem ve o nome final
+    # ve o arquivo inteiro); discard() apaga tmp quando o ultimo leitor terminar
+    # (objeto que nao coube no cache); sync=True faz fsync do arquivo e do diretorio
+    # watch(w): w() e chamado a cada chunk e no fim (leitores asyncio, ver follow)
+    def __init__(s,tmp,size=None,sync=False):
+        s.path=tmp; s.size=size; s.sync=sync; s.n=0; s.done=False; s.err=None; s.r=0; s.gone=False
+        s.cv=threading.Condition(); s.fh=open(tmp,'wb'); s.ws=[]
+    def _wake(s):
+        for w in list(s.ws): w()
+    def watch(s,w): s.ws.append(w)
+    def unwatch(s,w): s.ws.remove(w)
+    def write(s,b):
+        s.fh.write(b); s.fh.flush()
+        with s.cv: s.n+=len(b); s.cv.notify_all()
+        s._wake()
+    def close(s):
+        if s.sync: s.fh.flush(); os.fsync(s.fh.fileno())
+        s.fh.close()
+    def commit(s,final):
+        with s.cv: os.replace(s.path,final); s.path=final
+        if s.sync:
+            fd=os.open(os.path.dirname(final) or '.',os.O_RDONLY)
+            try: os.fsync(fd)
+            finally: os.close(fd)
+    def discard(s):
+        with s.cv: s.gone=True; last=not s.r
+        if last: os.remove(s.path)
+    def finish(s,err=None):
+        if not s.fh.closed: s.fh.close()
+        with s.cv: s.done=True; s.err=err; s.cv.notify_all()
+        s._wake()
+    def reader(s,chunk=CHUNK):
+        with s.cv: s.r+=1; fh=open(s.path,'rb')
+        return _Reader(s,fh,chunk)
+    def areader(s,chunk=CHUNK): return _AReader(s,s.reader(chunk))  # dentro do loop asyncio
+    def _left(s):
+        with s.cv: s.r-=1; last=not s.r and s.gone
+        if last: os.remove(s.path)
+class Pass:
+    # objeto maior que o cache inteiro (Content-Length > capacidade): nao entraria na
+    # politica, entao nao passa pelo disco; os chunks da fonte vao direto para um
+    # leitor so. quem chegou junto recebe FileNotFoundError e busca por conta propria
+    def __init__(s,it,size): s.it=it; s.size=size; s.lk=threading.Lock(); s.taken=False
+    def reader(s,chunk=CHUNK):
+        with s.lk:
+            if s.taken: raise FileNotFoundError
+            s.taken=True
+        return s.it
+    def areader(s,chunk=CHUNK): return s.reader(chunk)  # iteravel assincrono da fonte
+class _Reader:
+    # iteravel de resposta (Flask/WSGI) que segue o arquivo enquanto ele cresce
+    def __init__(s,fl,fh,chunk): s.fl=fl; s.fh=fh; s.chunk=chunk; s.pos=0
+    def __iter__(s): return s
+    def __next__(s):
+        fl=s.fl
+        with fl.cv:
+            while s.pos==fl.n and not fl.done: fl.cv.wait()
+            n=fl.n; err=fl.err
+        if err is not None: s.close(); raise err
+        if s.pos>=n: s.close(); raise StopIteration
+        b=s.fh.read(min(s.chunk,n-s.pos)); s.pos+=len(b); return b
+    def close(s):
+        if not s.fh.closed: s.fh.close(); s.fl._left()
+class _AReader:
+    # leitor asyncio: como o _Reader, mas espera o proximo chunk num asyncio.Event
+    # (acordado via watch) em vez de prender uma thread; le o disco no executor
+    def __init__(s,fl,rd):
+        s.fl=fl; s.rd=rd; s.loop=asyncio.get_running_loop(); s.ev=asyncio.Event(); fl.watch(s._w)
+    def _w(s): s.loop.call_soon_threadsafe(s.ev.set)
+    def __aiter__(s): return s
+    async def __anext__(s):
+        fl=s.fl; rd=s.rd
+        while True:
+            s.ev.clear()
+            with fl.cv: n=fl.n; done=fl.done; err=fl.err
+            if rd.pos<n:
+                b=await asyncio.to_thread(rd.fh.read,min(rd.chunk,n-rd.pos)); rd.pos+=len(b); return b
+            if err is not None: s.close(); raise err
+            if done: s.close(); raise StopAsyncIteration
+            await s.ev.wait()
+    def close(s):
+        if s.rd is not None: s.fl.unwatch(s._w); s.rd.close(); s.rd=None
+    async def aclose(s): s.close()
+async def achunks(path,chunk=CHUNK):
+    with open(path,'rb') as fh:
+        while b:=await asyncio.to_thread(fh.read,chunk): yield b
@@ -0,0 +1,44 @@
+import heapq
+class GDSFCache:
+    # GreedyDual-Size-Frequency: prioridade H = L + freq*custo/tamanho
+    # custo = latencia medida ao buscar o objeto (vizinho ou origem), entao
+    # objetos pequenos, quentes e caros de rebuscar ficam; videos grandes e frios saem
+    # L = prioridade da ultima vitima (inflacao): objetos parados envelhecem sozinhos
+    # eviction: heap com atualizacao preguicosa (versao em s.v), O(log n)
+    # capacidade em unidades de tamanho: sz=1 conta objetos, sz=bytes conta bytes
+    def __init__(s,c): s.c=c; s.u=0; s.L=0.0; s.f={}; s.z={}; s.k={}; s.p={}; s.v={}; s.h=[]; s.i=0
+    def __len__(s): return len(s.v)
+    def __contains__(s,k): return k in s.v
+    def _push(s,k):
+        s.p[k]=s.L+s.f[k]*s.k[k]/max(s.z[k],1)
+        s.i+=1; s.v[k]=s.i; heapq.heappush(s.h,(s.p[k],s.i,k))
+        if len(s.h)>2*len(s.v)+64:
+            s.h=[(s.p[x],i,x) for x,i in s.v.items()]; heapq.heapify(s.h)
+    def _pop(s):
+        while True:
+            p,i,k=heapq.heappop(s.h)
+            if s.v.get(k)==i:
+                s.L=p; del s.v[k],s.f[k],s.k[k],s.p[k]; s.u-=s.z.pop(k); return k
+    def _fit(s,n):
+        evs=[]
+        while s.v and s.u+n>s.c: evs.append(s._pop())
+        return evs
+    def victim(s):
+        while s.h and s.v.get(s.h[0][2])!=s.h[0][1]: heapq.heappop(s.h)
+        return s.h[0][2] if s.h else None
+    def evict(s,n): return s._fit(s.c-s.u+n)  # libera pelo menos n unidades
+    def keys(s): return list(s.v)
+    def remove(s,k):
+        # a entrada no heap fica velha (sem versao em s.v) e cai no proximo pop
+        if k not in s.v: return False
+        del s.v[k],s.f[k],s.k[k],s.p[k]; s.u-=s.z.pop(k); return True
+    def access(s,k):
+        if k in s.v: s.f[k]+=1; s._push(k); return True
+        return False
+    def insert(s,k,sz=1,cost=1.0):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        if k in s.v:
+            s.f[k]+=1; s.k[k]=cost; s.u+=sz-s.z[k]; s.z[k]=sz; s._push(k); return s._fit(0)
+        if sz>s.c: return [k]
+        evs=s._fit(sz)
+        s.f[k]=1; s.k[k]=cost; s.z[k]=sz; s.u+=sz; s._push(k); return evs
@@ -1,11 +1,66 @@
+import heapq
 from collections import defaultdict
+L=2  # peso da demanda da propria regiao sobre a das vizinhas
+def _dd(): return defaultdict(int)  # funcao de modulo (e nao lambda) para o estado poder ir para snapshot
 class GreenCache:
-    def __init__(s,c,r): s.c=c; s.r=r; s.sc=defaultdict(int)
+    # GREEN: score = L*demanda da regiao do peer + demanda vinda das outras regioes
+    # s.d[regiao][chave] = contadores por regiao, s.t[chave] = score ponderado
+    # eviction: heap indexado com atualizacao preguicosa (entradas velhas sao
+    # descartadas no pop pela versao em s.v), O(log n) por operacao
+    # envelhecimento: a cada s.w eventos de demanda (None -> 10x o numero de
+    # entradas, 0 desliga) os contadores caem pela metade
+    # capacidade em unidades de tamanho: sz=1 conta objetos, sz=bytes conta bytes
+    def __init__(s,c,r,w=None):
+        s.c=c; s.r=r; s.w=w; s.n=0; s.u=0; s.z={}
+        s.d=defaultdict(_dd); s.t=defaultdict(int)
+        s.v={}; s.h=[]; s.i=0
+    def __len__(s): return len(s.v)
+    def __contains__(s,k): return k in s.v
+    def _push(s,k):
+        s.i+=1; s.v[k]=s.i; heapq.heappush(s.h,(s.t[k],s.i,k))
+        if len(s.h)>2*len(s.v)+64: s._heapify()
+    def _heapify(s):
+        s.h=[(s.t[k],i,k) for k,i in s.v.items()]; heapq.heapify(s.h)
+    def _pop(s):
+        while True:
+            t,i,k=heapq.heappop(s.h)
+            if s.v.get(k)==i: del s.v[k]; s.u-=s.z.pop(k); return k
+    def _fit(s,n):
+        evs=[]
+        while s.v and s.u+n>s.c: evs.append(s._pop())
+        return evs
+    def _age(s):
+        t=defaultdict(int)
+        for r in list(s.d):
+            d=s.d[r]
+            for k in list(d):
+                d[k]>>=1
+                if d[k]: t[k]+=d[k]*(L if r==s.r else 1)
+                else: del d[k]
+            if not d: del s.d[r]
+        s.t=t; s._heapify()
+    def demand(s,k,r,n=1):
+        # demanda de qualquer regiao: a propria (acessos locais) ou a de um vizinho
+        s.d[r][k]+=n; s.t[k]+=n*(L if r==s.r else 1)
+        if k in s.v: s._push(k)
+        s.n+=1; w=10*max(len(s.v),1) if s.w is None else s.w
+        if w and s.n>=w: s.n=0; s._age()
+    def score(s,k): return s.t.get(k,0)
+    def victim(s):
+        while s.h and s.v.get(s.h[0][2])!=s.h[0][1]: heapq.heappop(s.h)
+        return s.h[0][2] if s.h else None
+    def evict(s,n): return s._fit(s.c-s.u+n)  # libera pelo menos n unidades
+    def keys(s): return list(s.v)
+    def remove(s,k):
+        # a demanda por regiao continua contando; so a entrada sai
+        if k not in s.v: return False
+        del s.v[k]; s.u-=s.z.pop(k); return True
     def access(s,k):
-        if k in s.sc: s.sc[k]+=2; return True
+        if k in s.v: s.demand(k,s.r); return True
         return False
-    def insert(s,k):
-        if k in s.sc: s.sc[k]+=2; return None
-        ev=None
-        if len(s.sc)>=s.c: ev=min(s.sc,key=s.sc.get); del s.sc[ev]
-        s.sc[k]=2; return ev
+    def insert(s,k,sz=1):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        if k in s.v: s.demand(k,s.r); s.u+=sz-s.z[k]; s.z[k]=sz; return s._fit(0)
+        if sz>s.c: s.demand(k,s.r); return [k]
+        evs=s._fit(sz)
+        s.demand(k,s.r); s.z[k]=sz; s.u+=sz; s._push(k); return evs
@@ -0,0 +1,119 @@
+import atexit, os, pickle, struct, threading, time
+# registro do diario: op(1) + shard(2) + tamanho da chave(2) + tamanho dos campos(2) + chave + campos
+R=struct.Struct('<cHHH'); N=struct.Struct('<I'); Q=struct.Struct('<Q'); QD=struct.Struct('<Qd')
+A,D,I,X,E=b'a',b'd',b'i',b'x',b'e'
+FMT=4  # formato do snapshot/diario; outro formato no disco = comeca do zero
+class Journal:
+    # metadados da politica que sobrevivem a reinicios: snapshot (pickle de cada
+    # shard) + diario append-only binario com os eventos desde o snapshot
+    # na partida carrega o snapshot e reaplica o diario, entao a politica volta com
+    # as mesmas contagens/scores e escolhe as mesmas vitimas de antes de parar
+    # mk() devolve um ShardedCache; os eventos chegam pelo gancho s.p.on, dentro do
+    # lock do shard, e vao para um buffer do shard (sem syscall nem lock global no
+    # acerto); a thread de fundo grava os buffers a cada FLUSH segundos
+    # cada shard e um diario independente: a ordem vale dentro do shard, e as
+    # evictions do orcamento global (que cruzam shards) entram como op propria;
+    # as do proprio insert sao consequencia deterministica e nao vao
+    # remocoes (arquivo que sumiu do disco) nao sao deterministicas: vao, com op propria
+    # snapshot por shard: cada um e copiado sob o proprio lock e no mesmo instante
+    # passa a escrever no diario da geracao seguinte; os outros shards seguem atendendo
+    # geracao g: o snapshot g vale com os diarios g, g+1...; um crash antes de publicar
+    # o snapshot g+1 reaplica g e depois g+1, sem perder nem repetir eventos de um shard
+    # tag = configuracao (politica, capacidade...); se mudou, o estado salvo e descartado
+    # a partida reaplica cada evento do diario (~1-8 us por evento); MAXN eventos
+    # desde o ultimo snapshot antecipam o proximo, entao o replay fica limitado
+    FLUSH=1.0; MAXN=200_000
+    def __init__(s,d,mk,tag):
+        os.makedirs(d,exist_ok=True); s.d=d; s.tag=repr(tag); s.fl=threading.Lock(); s.n=0; s.j=None
+        s.sp=os.path.join(d,'snapshot'); s.g=0; s.p=None
+        try:
+            with open(s.sp,'rb') as fh: fmt,tag,g,ps=pickle.load(fh)
+            if fmt==FMT and tag==s.tag:
+                p=mk(); p.sh=[pickle.loads(b) for b in ps]; s.p=p; s.g=g
+        except FileNotFoundError: pass
+        except Exception as e: print(f"[journal] estado salvo ilegivel, comecando do zero: {e}"); s.p=None
+        sg=s.g; gs=sorted(int(f[7:]) for f in os.listdir(d) if f.startswith('diario.') and f[7:].isdigit())
+        for g in gs:
+            # diarios >= geracao do snapshot sao reaplicados em ordem (e ficam ate o proximo snapshot)
+            if s.p is None or g<sg: os.remove(s._jp(g))
+            else: s.n+=s._replay(s._jp(g)); s.g=g
+        fresh=s.p is None
+        if fresh: s.p=mk()
+        else: s.p.u=sum(x.u for x in s.p.sh)
+        s.b=[bytearray() for _ in range(s.p.n)]; s.p.on=s._log
+        if fresh: s.snapshot()
+        else: s.j=open(s._jp(s.g),'ab')
+        atexit.register(s.flush)
+    def _jp(s,g): return os.path.join(s.d,f'diario.{g}')
+    def _replay(s,path):
+        try:
+            with open(path,'rb') as fh: b=fh.read()
+        except FileNotFoundError: return 0
+        i=0; n=0; m=len(b); sh=s.p.sh; up=R.unpack_from; rs=R.size
+        while i+rs<=m:
+            op,j,kl,xl=up(b,i); e=i+rs+kl
+            if e+xl>m: break  # ultimo registro cortado por um crash
+            k=b[i+rs:e].decode(); n+=1
+            if op==A: sh[j].access(k); i=e; continue  # acertos sao quase todo o diario: caminho curto
+            x=b[e:e+xl]; i=e+xl; p=sh[j]
+            if op==D: p.demand(k,x[N.size:].decode(),N.unpack_from(x)[0])
+            elif op==X: p.remove(k)
+            elif op==E: p.evict(Q.unpack(x)[0])
+            elif len(x)==QD.size: p.insert(k,*QD.unpack(x))
+            else: p.insert(k,Q.unpack(x)[0])
+        if i<m: os.truncate(path,i)
+        return n
+    def _log(s,i,op,*a):
+        # dentro do lock do shard i: so acrescenta ao buffer dele
+        if op=='access': r=(A,a[0],b'')
+        elif op=='insert': r=(I,a[0],QD.pack(*a[1:]) if len(a)>2 else Q.pack(a[1]))
+        elif op=='demand': r=(D,a[0],N.pack(a[2])+a[1].encode())
+        elif op=='remove': r=(X,a[0],b'')
+        else: r=(E,'',Q.pack(a[0]))
+        kb=r[1].encode(); s.b[i]+=R.pack(r[0],i,len(kb),len(r[2]))+kb+r[2]; s.n+=1
+    def _take(s,i):
+        with s.p.lk[i]: b=s.b[i]; s.b[i]=bytearray()
+        return b
+    def flush(s):
+        # buffers dos shards -> diario atual (um write por shard com eventos)
+        with s.fl:
+            if s.j is None: return
+            for i in range(len(s.b)):
+                if s.b[i]: s.j.write(s._take(i))
+            s.j.flush()
+    def snapshot(s):
+        # grava o estado atual e comeca a geracao seguinte do diario, um shard por vez
+        with s.fl:
+            g=s.g+1; j=open(s._jp(g),'ab'); p=s.p; ps=[]; old=[]
+            for i in range(p.n):
+                with p.lk[i]:
+                    old.append(s.b[i]); s.b[i]=bytearray(); ps.append(pickle.dumps(p.sh[i],pickle.HIGHEST_PROTOCOL))
+            if s.j: s.j.write(b''.join(old)); s.j.close()  # fim da geracao g
+            with open(s.sp+'.tmp','wb') as fh: pickle.dump((FMT,s.tag,g,ps),fh,pickle.HIGHEST_PROTOCOL)
+            os.replace(s.sp+'.tmp',s.sp)
+            s.j=j; s.g=g; s.n=0
+        for f in os.listdir(s.d):
+            if f.startswith('diario.') and f[7:].isdigit() and int(f[7:])<g: os.remove(os.path.join(s.d,f))
+    def close(s):
+        s.flush()
+        with s.fl: s.j.close(); s.j=None
+    def _loop(s,t):
+        last=time.monotonic()
+        while True:
+            time.sleep(s.FLUSH)
+            if s.n and (time.monotonic()-last>=t or s.n>=s.MAXN): s.snapshot(); last=time.monotonic()
+            else: s.flush()
+    def start(s,t=60.0):
+        threading.Thread(target=s._loop,args=(t,),daemon=True).start(); return s
+    @property
+    def u(s): return s.p.u
+    @property
+    def c(s): return s.p.c
+    def __len__(s): return len(s.p)
+    def __contains__(s,k): return k in s.p
+    def keys(s): return s.p.keys()
+    def remove(s,k): return s.p.remove(k)
+    def reserve(s,n): return s.p.reserve(n)  # nao vai para o diario (so as evictions que causar)
+    def demand(s,k,r,n=1): s.p.demand(k,r,n)
+    def access(s,k): return s.p.access(k)
+    def insert(s,k,sz=1,*a): return s.p.insert(k,sz,*a)
@@ -1,11 +1,53 @@
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 class LFUCache:
-    def __init__(s,c): s.c=c; s.f=defaultdict(int)
+    # LFU O(1): baldes de frequencia (freq -> chaves em ordem LRU) e s.m = menor freq
+    # envelhecimento: a cada s.w operacoes todas as frequencias caem pela metade
+    # (w=None -> 10x o numero de entradas, w=0 desliga), assim popularidade antiga expira
+    # capacidade em unidades de tamanho: sz=1 conta objetos, sz=bytes conta bytes
+    def __init__(s,c,w=None):
+        s.c=c; s.w=w; s.n=0; s.u=0
+        s.f={}; s.z={}; s.b=defaultdict(OrderedDict); s.m=0
+    def __len__(s): return len(s.f)
+    def __contains__(s,k): return k in s.f
+    def _bump(s,k):
+        f=s.f[k]; b=s.b[f]; del b[k]
+        if not b:
+            del s.b[f]
+            if s.m==f: s.m=f+1
+        s.f[k]=f+1; s.b[f+1][k]=None
+    def _tick(s):
+        s.n+=1; w=10*max(len(s.f),1) if s.w is None else s.w
+        if w and s.n>=w: s.n=0; s._age()
+    def _age(s):
+        # custo O(n) a cada w operacoes -> O(1) amortizado com w proporcional a n
+        b=defaultdict(OrderedDict)
+        for f in sorted(s.b):
+            g=max(1,f>>1)
+            for k in s.b[f]: b[g][k]=None; s.f[k]=g
+        s.b=b; s.m=min(b) if b else 0
+    def _fit(s,n):
+        evs=[]
+        while s.f and s.u+n>s.c:
+            b=s.b[s.m]; ev=b.popitem(last=False)[0]; del s.f[ev]; s.u-=s.z.pop(ev); evs.append(ev)
+            if not b: del s.b[s.m]; s.m=min(s.b) if s.b else 0
+        return evs
+    def victim(s): return next(iter(s.b[s.m])) if s.f else None
+    def evict(s,n): return s._fit(s.c-s.u+n)  # libera pelo menos n unidades
+    def keys(s): return list(s.f)
+    def remove(s,k):
+        if k not in s.f: return False
+        f=s.f.pop(k); b=s.b[f]; del b[k]; s.u-=s.z.pop(k)
+        if not b:
+            del s.b[f]
+            if s.m==f: s.m=min(s.b) if s.b else 0
+        return True
     def access(s,k):
-        if k in s.f: s.f[k]+=1; return True
+        if k in s.f: s._tick(); s._bump(k); return True
         return False
-    def insert(s,k):
-        if k in s.f: s.f[k]+=1; return None
-        ev=None
-        if len(s.f)>=s.c: ev=min(s.f,key=s.f.get); del s.f[ev]
-        s.f[k]=1; return ev
+    def insert(s,k,sz=1):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        s._tick()
+        if k in s.f: s._bump(k); s.u+=sz-s.z[k]; s.z[k]=sz; return s._fit(0)
+        if sz>s.c: return [k]
+        evs=s._fit(sz)
+        s.f[k]=1; s.z[k]=sz; s.u+=sz; s.b[1][k]=None; s.m=1; return evs
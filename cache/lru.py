@@ -1,11 +1,29 @@
-from collections import deque
+from collections import OrderedDict
 class LRUCache:
-    def __init__(s,c): s.c=c; s.q=deque(); s.s=set()
+    # OrderedDict = hash + lista duplamente ligada: hit, insert e evict em O(1)
+    # fim da fila = mais recente, inicio = proxima vitima
+    # capacidade em unidades de tamanho: sz=1 conta objetos, sz=bytes conta bytes
+    def __init__(s,c): s.c=c; s.u=0; s.q=OrderedDict()
+    def __len__(s): return len(s.q)
+    def __contains__(s,k): return k in s.q
+    def _fit(s,n):
+        evs=[]
+        while s.q and s.u+n>s.c:
+            ev,z=s.q.popitem(last=False); s.u-=z; evs.append(ev)
+        return evs
+    def victim(s): return next(iter(s.q),None)
+    def evict(s,n): return s._fit(s.c-s.u+n)  # libera pelo menos n unidades
+    def keys(s): return list(s.q)
+    def remove(s,k):
+        # tira k sem conta-lo como vitima (ex.: arquivo sumiu do disco); True se estava
+        z=s.q.pop(k,None)
+        if z is None: return False
+        s.u-=z; return True
     def access(s,k):
-        if k in s.s: s.q.remove(k); s.q.appendleft(k); return True
+        if k in s.q: s.q.move_to_end(k); return True
         return False
-    def insert(s,k):
-        if k in s.s: s.q.remove(k); s.q.appendleft(k); return None
-        ev=None
-        if len(s.s)>=s.c: ev=s.q.pop(); s.s.remove(ev)
-        s.s.add(k); s.q.appendleft(k); return ev
+    def insert(s,k,sz=1):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        if k in s.q: s.q.move_to_end(k); s.u+=sz-s.q[k]; s.q[k]=sz; return s._fit(0)
+        if sz>s.c: return [k]
+        evs=s._fit(sz); s.q[k]=sz; s.u+=sz; return evs
@@ -0,0 +1,45 @@
+import os, threading
+from collections import OrderedDict
+class MemTier:
+    # camada em memoria acima do diretorio CACHE: objetos pequenos e quentes sao
+    # servidos dos bytes guardados aqui, sem stat/open/read no disco
+    # inclusiva: o arquivo continua no disco, entao rebaixar = tirar da memoria
+    # (a politica do disco segue decidindo o que fica no peer)
+    # politica propria: LRU limitado a c bytes; objetos maiores que mx nunca sobem
+    # promocao: h acertos no disco, contados numa tabela LRU de ate n chaves
+    def __init__(s,c,mx=256*1024,h=2,n=4096):
+        s.c=c; s.mx=mx; s.h=h; s.n=n; s.u=0; s.q=OrderedDict(); s.k=OrderedDict(); s.lk=threading.Lock()
+        s.hits=0; s.up=0; s.down=0
+    def __len__(s): return len(s.q)
+    def __contains__(s,k): return k in s.q
+    def get(s,k):
+        with s.lk:
+            b=s.q.get(k)
+            if b is not None: s.q.move_to_end(k); s.hits+=1
+            return b
+    def hit(s,k,path):
+        # acerto no disco: conta e, quando k fica quente, le o arquivo para a memoria
+        with s.lk:
+            if k in s.q: return False
+            c=s.k.pop(k,0)+1
+            if c<s.h:
+                s.k[k]=c
+                if len(s.k)>s.n: s.k.popitem(last=False)
+                return False
+        try:
+            if os.path.getsize(path)>s.mx: return False
+            with open(path,'rb') as fh: b=fh.read(s.mx+1)
+        except OSError: return False
+        if len(b)>s.mx or len(b)>s.c: return False
+        with s.lk:
+            if k in s.q: return False
+            while s.q and s.u+len(b)>s.c: s.u-=len(s.q.popitem(last=False)[1]); s.down+=1
+            s.q[k]=b; s.u+=len(b); s.up+=1
+        return True
+    def drop(s,k):
+        # o disco perdeu k (eviction, copia curta expirada): sai da memoria tambem
+        with s.lk:
+            s.k.pop(k,None); b=s.q.pop(k,None)
+            if b is not None: s.u-=len(b)
+    def stats(s):
+        with s.lk: return {'objetos':len(s.q),'bytes':s.u,'limite':s.c,'acertos':s.hits,'promovidos':s.up,'rebaixados':s.down}
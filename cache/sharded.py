@@ -0,0 +1,77 @@
+import threading
+from cache.sketch import kh
+class ShardedCache:
+    # politica segura com threads: chaves vao por hash para n shards, cada um
+    # com sua instancia da politica (mk(c)) e seu lock, entao threads do Flask
+    # em chaves diferentes nao disputam o mesmo lock
+    # orcamento global: cada shard tem a capacidade inteira c (um objeto que cabe no
+    # cache cabe em qualquer shard), e quando a soma passa de c o shard mais cheio
+    # libera o excesso (s.el serializa isso; nunca se segura o lock de dois shards ao
+    # mesmo tempo, entao nao ha deadlock)
+    # s.on(i,op,*args): chamado dentro do lock do shard i a cada operacao que muda o
+    # shard (usado pelo diario: um buffer por shard, sem lock global)
+    def __init__(s,mk,c,n=16):
+        s.c=c; s.n=n; s.u=0; s.sh=[mk(c) for _ in range(n)]; s.lk=[threading.Lock() for _ in range(n)]
+        s.gl=threading.Lock(); s.el=threading.Lock(); s.on=None
+    def __getstate__(s):
+        d=dict(s.__dict__); del d['lk'],d['gl'],d['el'],d['on']; return d  # locks e gancho nao vao para o snapshot
+    def __setstate__(s,d):
+        s.__dict__.update(d); s.lk=[threading.Lock() for _ in range(s.n)]; s.gl=threading.Lock(); s.el=threading.Lock(); s.on=None
+    def _i(s,k): return kh(k)%s.n
+    def __len__(s): return sum(len(p) for p in s.sh)
+    def __contains__(s,k):
+        i=s._i(k)
+        with s.lk[i]: return k in s.sh[i]
+    def _add(s,d):
+        with s.gl: s.u+=d
+    def _budget(s):
+        evs=[]
+        with s.el:
+            while s.u>s.c:
+                i=max(range(s.n),key=lambda j: s.sh[j].u)
+                with s.lk[i]:
+                    p=s.sh[i]; u=p.u; n=s.u-s.c; evs+=p.evict(n); d=p.u-u
+                    if s.on: s.on(i,'evict',n)
+                s._add(d)
+                if not d: break
+        return evs
+    def reserve(s,n):
+        # n unidades ocupadas sem chave (preenchimento em andamento; n<0 devolve):
+        # contam no orcamento global e expulsam o que for preciso; devolve as vitimas
+        s._add(n)
+        return s._budget() if s.u>s.c else []
+    def keys(s):
+        ks=[]
+        for i in range(s.n):
+            with s.lk[i]: ks+=s.sh[i].keys()
+        return ks
+    def remove(s,k):
+        i=s._i(k)
+        with s.lk[i]:
+            p=s.sh[i]; u=p.u; r=p.remove(k); d=p.u-u
+            if s.on: s.on(i,'remove',k)
+        s._add(d)
+        return r
+    def demand(s,k,r,n=1):
+        i=s._i(k)
+        with s.lk[i]:
+            p=s.sh[i]
+            if hasattr(p,'demand'):
+                p.demand(k,r,n)
+                if s.on: s.on(i,'demand',k,r,n)
+            else:
+                p.access(k)
+                if s.on: s.on(i,'access',k)
+    def access(s,k):
+        i=s._i(k)
+        with s.lk[i]:
+            if s.on: s.on(i,'access',k)
+            return s.sh[i].access(k)
+    def insert(s,k,sz=1,*a):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        i=s._i(k)
+        with s.lk[i]:
+            p=s.sh[i]; u=p.u; evs=p.insert(k,sz,*a); d=p.u-u
+            if s.on: s.on(i,'insert',k,sz,*a)
+        s._add(d)
+        return evs+s._budget() if s.u>s.c else evs
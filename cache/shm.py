@@ -0,0 +1,141 @@
+import hashlib, mmap, multiprocessing, os, pickle, random
+from cache.green import L
+K=255  # bytes da chave: toda chave e um nome de arquivo, e o Linux nao passa de 255 (NAME_MAX)
+TOMB=1  # slot apagado (hash real sempre tem o bit 63 ligado)
+U,N,TB,CLK,OPS=range(5)  # cabecalho: bytes/unidades usadas, entradas, tombstones, relogio, ops desde o envelhecimento
+class SharedCache:
+    # politica num array em memoria compartilhada (mmap anonimo, herdado pelos
+    # processos filhos no fork): N workers do mesmo peer veem as mesmas chaves,
+    # tamanhos e scores e nao expulsam os arquivos uns dos outros
+    # tabela hash de enderecamento aberto com s.m slots, em arrays paralelos:
+    # hash (8 bytes) | tamanho (8) | score (8) | chave inteira (1+K); lock de processo por operacao
+    # sem ponteiros nao ha lista de recencia: a vitima e o menor score entre t entradas
+    # sorteadas (amostragem, como no Redis); ix/at e um indice denso dos slots ocupados
+    # para o sorteio nao varrer a tabela quase vazia
+    # score = relogio (LRU), contagem (LFU) ou demanda ponderada pela regiao r
+    # (GREEN); contagens caem pela metade a cada max(10x entradas, m) operacoes
+    # capacidade em unidades de tamanho: sz=1 conta objetos, sz=bytes conta bytes
+    def __init__(s,c,kind='LRU',r=None,m=1<<16,t=16):
+        s.c=c; s.kind=kind; s.r=r; s.t=t; s.m=1<<max(m-1,63).bit_length(); s.max=s.m*3//4; m=s.m
+        s.buf=mmap.mmap(-1,40+m*(40+1+K)); s.lk=multiprocessing.Lock(); v=memoryview(s.buf)
+        s.hd=v[:40].cast('Q'); o=40
+        s.hs=v[o:o+8*m].cast('Q'); o+=8*m
+        s.zs=v[o:o+8*m].cast('Q'); o+=8*m
+        s.sc=v[o:o+8*m].cast('d'); o+=8*m
+        s.ix=v[o:o+8*m].cast('Q'); o+=8*m  # posicao densa -> slot
+        s.at=v[o:o+8*m].cast('Q'); o+=8*m  # slot -> posicao densa
+        s.ks=v[o:]
+    @property
+    def u(s): return s.hd[U]
+    def __len__(s): return s.hd[N]
+    def __contains__(s,k):
+        kb=k.encode()
+        with s.lk: return s._find(kb,s._hash(kb))[0]>=0
+    def _hash(s,kb): return int.from_bytes(hashlib.blake2b(kb,digest_size=8).digest(),'little')|1<<63
+    def _key(s,i):
+        o=i*(K+1); return bytes(s.ks[o+1:o+1+s.ks[o]])
+    def _find(s,kb,h):
+        # (slot de k ou -1, primeiro slot livre no caminho de sondagem)
+        i=h&(s.m-1); free=-1; hs=s.hs
+        while True:
+            x=hs[i]
+            if x==0: return -1,(i if free<0 else free)
+            if x==TOMB:
+                if free<0: free=i
+            elif x==h and s._key(i)==kb: return i,i
+            i=(i+1)&(s.m-1)
+    def _w(s,r,n=1): return n*(L if r==s.r else 1) if s.kind=='GREEN' else n
+    def _touch(s,i,w):
+        if s.kind=='LRU': s.hd[CLK]+=1; s.sc[i]=s.hd[CLK]; return
+        s.sc[i]+=w; s.hd[OPS]+=1
+        if s.hd[OPS]>=max(10*s.hd[N],s.m):
+            s.hd[OPS]=0; sc=s.sc
+            for j in s.ix[:s.hd[N]]: sc[j]/=2
+    def _victim(s):
+        n=s.hd[N]; best=-1; sc=s.sc; ix=s.ix
+        if n<=s.t: cand=ix[:n]
+        else: cand=[ix[random.randrange(n)] for _ in range(s.t)]
+        for i in cand:
+            if best<0 or sc[i]<sc[best]: best=i
+        return best
+    def _drop(s,i):
+        k=s._key(i); s.hs[i]=TOMB; s.hd[U]-=s.zs[i]; s.hd[N]-=1; s.hd[TB]+=1
+        j=s.at[i]; last=s.ix[s.hd[N]]; s.ix[j]=last; s.at[last]=j
+        return k.decode()
+    def _fit(s,n):
+        evs=[]
+        while s.hd[N] and s.hd[U]+n>s.c: evs.append(s._drop(s._victim()))
+        return evs
+    def _rehash(s):
+        # muitos tombstones alongam as sondagens: reinsere as entradas vivas
+        live=[(s.hs[i],s.zs[i],s.sc[i],bytes(s.ks[i*(K+1):(i+1)*(K+1)])) for i in s.ix[:s.hd[N]]]
+        for i in range(s.m): s.hs[i]=0
+        for j,(h,z,sc,kb) in enumerate(live):
+            i=h&(s.m-1)
+            while s.hs[i]: i=(i+1)&(s.m-1)
+            s.hs[i]=h; s.zs[i]=z; s.sc[i]=sc; s.ks[i*(K+1):(i+1)*(K+1)]=kb; s.ix[j]=i; s.at[i]=j
+        s.hd[TB]=0
+    def keys(s):
+        with s.lk: return [s._key(i).decode() for i in s.ix[:s.hd[N]]]
+    def remove(s,k):
+        kb=k.encode()
+        with s.lk:
+            i=s._find(kb,s._hash(kb))[0]
+            if i<0: return False
+            s._drop(i); return True
+    def reserve(s,n):
+        # n unidades ocupadas sem chave (preenchimento em andamento; n<0 devolve):
+        # contam no orcamento e expulsam o que for preciso; devolve as vitimas
+        with s.lk: s.hd[U]+=n; return s._fit(0)
+    def victim(s):
+        with s.lk:
+            i=s._victim()
+            return s._key(i).decode() if i>=0 else None
+    def evict(s,n):  # libera pelo menos n unidades
+        with s.lk: return s._fit(s.c-s.hd[U]+n)
+    def score(s,k):
+        kb=k.encode()
+        with s.lk:
+            i=s._find(kb,s._hash(kb))[0]
+            return s.sc[i] if i>=0 else 0
+    def demand(s,k,r,n=1):
+        kb=k.encode(); h=s._hash(kb)
+        with s.lk:
+            i=s._find(kb,h)[0]
+            if i>=0: s._touch(i,s._w(r,n))
+    def access(s,k):
+        kb=k.encode(); h=s._hash(kb)
+        with s.lk:
+            i=s._find(kb,h)[0]
+            if i>=0: s._touch(i,s._w(s.r)); return True
+            return False
+    def insert(s,k,sz=1,*a):
+        # devolve a lista de chaves removidas (inclui k se ele nao couber)
+        kb=k.encode(); h=s._hash(kb)
+        with s.lk:
+            i=s._find(kb,h)[0]
+            if i>=0: s.hd[U]+=sz-s.zs[i]; s.zs[i]=sz; s._touch(i,s._w(s.r)); return s._fit(0)
+            if sz>s.c or len(kb)>K: return [k]  # chave maior que o slot nao entra (nunca guardada cortada)
+            evs=s._fit(sz)
+            while s.hd[N]>=s.max: evs.append(s._drop(s._victim()))
+            if s.hd[TB]>s.m//4: s._rehash()
+            p=s._find(kb,h)[1]
+            if s.hs[p]==TOMB: s.hd[TB]-=1
+            o=p*(K+1)
+            s.hs[p]=h; s.zs[p]=sz; s.sc[p]=0; s.ks[o]=len(kb); s.ks[o+1:o+1+len(kb)]=kb
+            s.ix[s.hd[N]]=p; s.at[p]=s.hd[N]
+            s.hd[U]+=sz; s.hd[N]+=1; s._touch(p,s._w(s.r))
+            return evs
+    def dump(s,path,tag):
+        # snapshot da tabela inteira (bytes crus) para reinicio aquecido
+        with s.lk: b=bytes(s.buf)
+        with open(path+'.tmp','wb') as fh: pickle.dump((repr(tag),s.m,b),fh,pickle.HIGHEST_PROTOCOL)
+        os.replace(path+'.tmp',path)
+    def load(s,path,tag):
+        try:
+            with open(path,'rb') as fh: t,m,b=pickle.load(fh)
+        except FileNotFoundError: return False
+        if t!=repr(tag) or m!=s.m or len(b)!=len(s.buf): return False
+        with s.lk:
+            s.buf[:]=b; s.hd[U]=sum(s.zs[i] for i in s.ix[:s.hd[N]])  # reservas de preenchimentos nao sobrevivem
+        return True
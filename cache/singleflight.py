@@ -0,0 +1,29 @@
+import threading
+from contextlib import contextmanager
+class _Call:
+    def __init__(s): s.ev=threading.Event(); s.v=None; s.e=None; s.n=0
+class SingleFlight:
+    # coalescencia de misses: o primeiro pedido de uma chave executa fn e os
+    # pedidos concorrentes da mesma chave esperam e recebem o mesmo resultado
+    # (ou a mesma excecao), em vez de cada um ir aos vizinhos/origem
+    # done(v), se dado, roda quando o ultimo participante sai do with
+    def __init__(s): s.lk=threading.Lock(); s.m={}
+    def __len__(s): return len(s.m)
+    @contextmanager
+    def do(s,k,fn,done=None):
+        with s.lk:
+            c=s.m.get(k); lead=c is None
+            if lead: c=s.m[k]=_Call()
+            c.n+=1
+        if lead:
+            try: c.v=fn()
+            except Exception as e: c.e=e
+            with s.lk: del s.m[k]
+            c.ev.set()
+        else: c.ev.wait()
+        try:
+            if c.e is not None: raise c.e
+            yield c.v
+        finally:
+            with s.lk: c.n-=1; last=not c.n
+            if last and done and c.e is None: done(c.v)
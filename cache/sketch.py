@@ -0,0 +1,25 @@
+import zlib
+from array import array
+M=(1<<64)-1
+def kh(k):
+    # hash estavel entre execucoes (hash() de str muda a cada processo), assim
+    # contadores e shards salvos num snapshot continuam valendo apos reiniciar
+    return zlib.crc32(k.encode()) if isinstance(k,str) else hash(k)
+class CountMinSketch:
+    # Count-Min com d linhas de n contadores de 1 byte (saturam em 15, como os
+    # contadores de 4 bits do TinyLFU): d*n bytes no total, ~4 bytes por chave
+    # a cada s.p incrementos todos os contadores caem pela metade (reset do TinyLFU)
+    def __init__(s,n=1<<16,d=4,p=None):
+        s.n=1<<max(n-1,1).bit_length(); s.d=d; s.p=10*s.n if p is None else p; s.i=0
+        s.t=array('B',bytes(s.n*d))
+    def _idx(s,k):
+        h=(kh(k)*0x9E3779B97F4A7C15)&M; g=(h>>32)|1; m=s.n-1
+        return [r*s.n+((h+r*g)&m) for r in range(s.d)]
+    def add(s,k):
+        ix=s._idx(k); v=min(s.t[i] for i in ix)
+        if v<15:
+            for i in ix:
+                if s.t[i]==v: s.t[i]=v+1  # incremento conservador
+        s.i+=1
+        if s.i>=s.p: s.i=0; s.t=array('B',(x>>1 for x in s.t))
+    def est(s,k): return min(s.t[i] for i in s._idx(k))
@@ -0,0 +1,44 @@
+from cache.lru import LRUCache
+from cache.sketch import CountMinSketch
+class TinyLFU:
+    # W-TinyLFU: filtro de admissao na frente de qualquer politica
+    # novos objetos entram numa janela LRU pequena (wp da capacidade); quem sai
+    # da janela so entra na politica principal se a frequencia estimada pelo
+    # Count-Min for maior que a da proxima vitima dela, senao e descartado
+    # assim uma varredura (crawler) nao expulsa o conjunto quente
+    # mk(c) constroi a politica principal (LRU/LFU/GREEN/GDSF) com capacidade c
+    def __init__(s,mk,c,n=1<<16,wp=0.01):
+        w=max(1,int(c*wp)); s.c=c; s.win=LRUCache(w); s.m=mk(c-w); s.s=CountMinSketch(n)
+        s.z={}; s.a={}  # tamanho e argumentos extras (custo do GDSF) de quem esta na janela
+    @property
+    def u(s): return s.win.u+s.m.u
+    def __len__(s): return len(s.win)+len(s.m)
+    def __contains__(s,k): return k in s.win or k in s.m
+    def _admit(s,k):
+        z=s.z.pop(k); a=s.a.pop(k)
+        if s.m.u+z>s.m.c:
+            v=s.m.victim()
+            if v is not None and s.s.est(k)<=s.s.est(v): return [k]
+        return s.m.insert(k,z,*a)
+    def evict(s,n):
+        u=s.u; evs=s.m.evict(n); n-=u-s.u
+        if n>0:
+            for k in s.win.evict(n): s.z.pop(k,None); s.a.pop(k,None); evs.append(k)
+        return evs
+    def keys(s): return s.win.keys()+s.m.keys()
+    def remove(s,k):
+        if s.win.remove(k): s.z.pop(k,None); s.a.pop(k,None); return True
+        return s.m.remove(k)
+    def demand(s,k,r,n=1):
+        s.s.add(k)
+        if hasattr(s.m,'demand'): s.m.demand(k,r,n)
+        else: s.win.access(k) or s.m.access(k)
+    def access(s,k):
+        s.s.add(k); return s.win.access(k) or s.m.access(k)
+    def insert(s,k,sz=1,*a):
+        # devolve a lista de chaves removidas (inclui k se ele nao for admitido)
+        s.s.add(k)
+        if k in s.m: return s.m.insert(k,sz,*a)
+        s.z[k]=sz; s.a[k]=a; evs=[]
+        for c in s.win.insert(k,sz): evs+=s._admit(c)
+        return evs
@@ -0,0 +1,37 @@
+import os, ssl
+from werkzeug.wsgi import FileWrapper
+stats={'respostas':0,'bytes':0}  # servidas por sendfile neste processo
+class _Body:
+    # corpo 200/206 de send_file: o servidor manda status e cabecalhos no b'' e
+    # os bytes vao do page cache direto para o socket (os.sendfile via
+    # socket.sendfile, que sozinho cai para send() quando o kernel nao deixa)
+    def __init__(s,sock,fh,off,n,it): s.sock=sock; s.fh=fh; s.off=off; s.n=n; s.it=it
+    def __iter__(s):
+        yield b''
+        if s.n: s.sock.sendfile(s.fh,s.off,s.n)
+        stats['bytes']+=s.n
+    def close(s):
+        if hasattr(s.it,'close'): s.it.close()
+def zerocopy(app):
+    # middleware WSGI para o servidor do werkzeug (app.run/make_server), que le e
+    # copia o arquivo em blocos de 8 KB pelo Python; instala um wsgi.file_wrapper
+    # para achar o arquivo aberto por send_file, que continua cuidando de Range,
+    # 304 e 416. Sem socket cru (outro servidor WSGI, TLS) ou sem os.sendfile,
+    # passa direto e vale o caminho de copia de sempre
+    def wsgi(env,start):
+        sock=env.get('werkzeug.socket')
+        if sock is None or isinstance(sock,ssl.SSLSocket) or not hasattr(os,'sendfile') or 'wsgi.file_wrapper' in env:
+            return app(env,start)
+        got=[]; st=[]
+        def wrap(fh,n=8192): w=FileWrapper(fh,n); got.append(w); return w
+        def start_(status,headers,exc=None): st[:]=[status,headers]; return start(status,headers,exc)
+        env['wsgi.file_wrapper']=wrap
+        it=app(env,start_)
+        if not got or env['REQUEST_METHOD']=='HEAD' or st[0][:3] not in ('200','206'):
+            return it
+        hd={k.lower():v for k,v in st[1]}
+        if 'content-length' not in hd: return it
+        off=int(hd['content-range'].split()[1].split('-')[0]) if 'content-range' in hd else 0
+        stats['respostas']+=1
+        return _Body(sock,got[0].file,off,int(hd['content-length']),it)
+    return wsgi
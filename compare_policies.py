@@ -258,7 +258,6 @@ def test_regional_popularity():
     print("Cache Size: 2 arquivos")
     print("Padrão: 70% requisições em arquivo 'regional', 30% em outro")
     print("\nExpectativa: GREEN deveria ter melhor desempenho")
-    print("(conceitual - implementação atual é simplificada)")
     print("-" * 80)
     
     comp = PolicyComparator()
@@ -0,0 +1,38 @@
+import asyncio
+async def ahedged(ps,fn,delay,drop=None):
+    # hedged() para corrotinas: fn(p) e uma corrotina que devolve o resultado ou
+    # None; o proximo peer sai apos delay(p) segundos ou na hora se o atual falhou
+    # o primeiro resultado bom vence, os pedidos pendentes sao cancelados e
+    # resultados bons que chegaram junto vao para drop (ex.: liberar a resposta)
+    it=iter(ps); pend=set(); last=None; win=None
+    def launch():
+        nonlocal last
+        p=next(it,None)
+        if p is None: return False
+        pend.add(asyncio.ensure_future(fn(p))); last=p; return True
+    more=launch()
+    try:
+        while pend and win is None:
+            done,_=await asyncio.wait(pend,timeout=delay(last) if more else None,return_when=asyncio.FIRST_COMPLETED)
+            if not done: more=launch(); continue
+            for fu in done:
+                pend.discard(fu)
+                r=None if fu.cancelled() or fu.exception() else fu.result()
+                if r is None: continue
+                if win is None: win=r
+                elif drop: drop(r)
+            if win is None: more=more and launch()
+    finally:
+        for fu in pend: fu.cancel()
+    return win
+class AsyncFlight:
+    # SingleFlight para corrotinas: pedidos concorrentes da mesma chave esperam a
+    # mesma tarefa; um cliente que desiste (cancelado) nao cancela a busca dos outros
+    def __init__(s): s.m={}
+    def __len__(s): return len(s.m)
+    async def do(s,k,fn):
+        fu=s.m.get(k)
+        if fu is None:
+            fu=s.m[k]=asyncio.ensure_future(fn())
+            fu.add_done_callback(lambda _: s.m.pop(k,None))
+        return await asyncio.shield(fu)
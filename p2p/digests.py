@@ -0,0 +1,21 @@
+import threading, time
+from cache.digest import Digest
+class DigestTable:
+    # digests dos vizinhos, puxados de pull(p) (ex.: GET /digest) a cada t segundos
+    # maybe(p,k): o vizinho provavelmente tem k? sem digest ainda -> True (sonda)
+    def __init__(s,peers,pull,t=10.0): s.peers=list(peers); s.pull=pull; s.t=t; s.d={}; s.at={}
+    def maybe(s,p,k):
+        d=s.d.get(p)
+        return d is None or k in d
+    def candidates(s,ps,k): return [p for p in ps if s.maybe(p,k)]
+    def refresh(s,p):
+        try: b,k=s.pull(p)
+        except Exception: return False
+        s.d[p]=Digest(b,k); s.at[p]=time.time(); return True
+    def _loop(s):
+        while True:
+            for p in s.peers: s.refresh(p)
+            time.sleep(s.t)
+    def start(s):
+        threading.Thread(target=s._loop,daemon=True).start(); return s
+    def stats(s): return {p:{'bytes':len(s.d[p].b),'idade_s':round(time.time()-s.at[p],1)} for p in s.d}
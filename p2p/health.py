@@ -0,0 +1,31 @@
+import threading, time
+class PeerHealth:
+    # circuit breaker por vizinho: apos n falhas seguidas o circuito abre e o
+    # peer sai do caminho dos pedidos; uma thread em segundo plano sonda
+    # probe(p) (ex.: GET /health) a cada t segundos e, se responder, fecha o
+    # circuito de novo. s.why guarda o motivo do estado atual
+    def __init__(s,peers,probe,n=3,t=5.0):
+        s.n=n; s.t=t; s.probe=probe; s.lk=threading.Lock()
+        s.fails={p:0 for p in peers}; s.open={p:False for p in peers}; s.why={p:'ok' for p in peers}; s.since={p:time.time() for p in peers}
+    def up(s,p): return not s.open[p]
+    def alive(s,ps): return [p for p in ps if not s.open[p]]
+    def ok(s,p):
+        with s.lk:
+            s.fails[p]=0
+            if s.open[p]: s.open[p]=False; s.why[p]='ok'; s.since[p]=time.time()
+    def fail(s,p,why):
+        with s.lk:
+            s.fails[p]+=1
+            if not s.open[p] and s.fails[p]>=s.n:
+                s.open[p]=True; s.since[p]=time.time(); s.why[p]=f'{s.fails[p]} falhas seguidas: {why}'
+    def _loop(s):
+        while True:
+            time.sleep(s.t)
+            for p in [p for p in s.open if s.open[p]]:
+                try: good=s.probe(p)
+                except Exception: good=False
+                if good: s.ok(p)
+    def start(s):
+        threading.Thread(target=s._loop,daemon=True).start(); return s
+    def stats(s):
+        return {p:{'estado':'aberto' if s.open[p] else 'fechado','motivo':s.why[p],'falhas':s.fails[p],'desde':s.since[p]} for p in s.open}
@@ -0,0 +1,34 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+def _ok(fu):
+    try: return fu.result()
+    except Exception: return None
+def hedged(pool,ps,fn,delay,drop=None):
+    # pedidos com hedge: ps vem do melhor para o pior peer; fn(p) devolve o
+    # resultado ou None (resposta ruim); se o peer atual nao respondeu em delay(p)
+    # dispara o proximo, se respondeu mal dispara o proximo na hora
+    # o primeiro resultado bom vence; delay=lambda p: 0 consulta todos em paralelo
+    # os outros resultados bons (que chegaram junto ou chegam depois, de pedidos ja
+    # em andamento) vao para drop (ex.: fechar a resposta e devolver a conexao)
+    it=iter(ps); pend=set(); last=None; win=None
+    def launch():
+        nonlocal last
+        p=next(it,None)
+        if p is None: return False
+        pend.add(pool.submit(fn,p)); last=p; return True
+    def late(fu):
+        r=_ok(fu)
+        if r is not None: drop(r)
+    more=launch()
+    while pend and win is None:
+        done,_=wait(pend,timeout=delay(last) if more else None,return_when=FIRST_COMPLETED)
+        if not done: more=launch(); continue
+        for fu in done:
+            pend.discard(fu)
+            r=_ok(fu)
+            if r is None: continue
+            if win is None: win=r
+            elif drop: drop(r)
+        if win is None: more=more and launch()
+    for fu in pend:
+        if not fu.cancel() and drop: fu.add_done_callback(late)
+    return win
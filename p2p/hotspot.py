@@ -0,0 +1,29 @@
+import threading, time
+class HotSpots:
+    # taxa de pedidos por chave numa janela deslizante de w segundos dividida
+    # em n baldes; hit(k) registra um pedido e devolve a taxa atual (pedidos/s)
+    # chaves sem pedidos na janela sao descartadas de tempos em tempos
+    def __init__(s,w=10.0,n=10): s.w=w; s.n=n; s.bw=w/n; s.c={}; s.t={}; s.lk=threading.Lock(); s.i=0
+    def _roll(s,k,cur):
+        c=s.c[k]; last=s.t[k]
+        for j in range(last+1,min(cur,last+s.n)+1): c[j%s.n]=0
+        s.t[k]=cur
+    def hit(s,k):
+        cur=int(time.time()/s.bw)
+        with s.lk:
+            if k not in s.c: s.c[k]=[0]*s.n; s.t[k]=cur
+            else: s._roll(k,cur)
+            s.c[k][cur%s.n]+=1; r=sum(s.c[k])/s.w
+            s.i+=1
+            if s.i>=4096: s.i=0; s._prune(cur)
+        return r
+    def rate(s,k):
+        cur=int(time.time()/s.bw)
+        with s.lk:
+            if k not in s.c: return 0.0
+            s._roll(k,cur); return sum(s.c[k])/s.w
+    def _prune(s,cur):
+        for k in [k for k,t in s.t.items() if cur-t>=s.n]: del s.c[k],s.t[k]
+    def top(s,m=10):
+        with s.lk: ks=list(s.c)
+        return sorted(((k,s.rate(k)) for k in ks),key=lambda x:-x[1])[:m]
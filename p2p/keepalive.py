@@ -0,0 +1,58 @@
+import traceback
+from werkzeug.serving import WSGIRequestHandler
+from werkzeug.wsgi import LimitedStream
+class KeepAliveHandler(WSGIRequestHandler):
+    # o WSGIRequestHandler do werkzeug (app.run/make_server) manda 'Connection: close'
+    # em toda resposta e depois esvazia o socket por 10 ms, o que engoliria o proximo
+    # pedido de uma conexao reaproveitada: o pool dos vizinhos (PeerSessions) abriria
+    # um socket por pedido. Aqui o corpo do pedido e lido ate o Content-Length (nunca
+    # alem), a resposta vai com Content-Length ou chunked e o socket fica aberto para o
+    # proximo pedido. Corpo chunked ou Expect: 100-continue seguem pelo werkzeug, que fecha
+    # uma thread por conexao (servidor threaded): ociosa por timeout segundos, fecha.
+    # TCP_NODELAY: cabecalhos e corpo saem em escritas separadas, e num socket que nao
+    # fecha o Nagle seguraria o corpo ate o ACK atrasado do cliente (~40 ms por pedido)
+    protocol_version='HTTP/1.1'
+    timeout=75
+    disable_nagle_algorithm=True
+    def run_wsgi(s):
+        hd=s.headers
+        if hd.get('Transfer-Encoding') or hd.get('Expect'):
+            s.close_connection=True; return super().run_wsgi()
+        env=s.environ=s.make_environ()
+        body=env['wsgi.input']=LimitedStream(s.rfile,int(hd.get('Content-Length') or 0))
+        env['wsgi.input_terminated']=True
+        st=[]; sent=[]  # sent: [chunked?] depois que status e cabecalhos sairam
+        def start(status,headers,exc_info=None):
+            if exc_info and sent: raise exc_info[1].with_traceback(exc_info[2])
+            st[:]=[status,headers]; return write
+        def write(b):
+            if not sent:
+                code,_,msg=st[0].partition(' '); code=int(code)
+                s.send_response(code,msg); keys=set()
+                for k,v in st[1]: s.send_header(k,v); keys.add(k.lower())
+                chunked='content-length' not in keys and env['REQUEST_METHOD']!='HEAD' and not (100<=code<200 or code in (204,304))
+                if chunked and s.request_version>='HTTP/1.1': s.send_header('Transfer-Encoding','chunked')
+                elif chunked: s.close_connection=True; chunked=False  # HTTP/1.0: o fim do corpo e o fim da conexao
+                if s.close_connection: s.send_header('Connection','close')
+                s.end_headers(); sent.append(chunked)
+            if b:
+                if sent[0]: s.wfile.write(b'%x\r\n'%len(b)); s.wfile.write(b); s.wfile.write(b'\r\n')
+                else: s.wfile.write(b)
+            s.wfile.flush()
+        try:
+            it=s.server.app(env,start)
+            try:
+                for b in it: write(b)
+                if not sent: write(b'')
+                if sent[0]: s.wfile.write(b'0\r\n\r\n'); s.wfile.flush()
+            finally:
+                if hasattr(it,'close'): it.close()
+            body.exhaust()  # o que a aplicacao nao leu do corpo, para o proximo pedido comecar no lugar certo
+        except (ConnectionError,TimeoutError) as e:
+            s.close_connection=True; s.connection_dropped(e,env)
+        except Exception:
+            s.close_connection=True
+            s.log_error('%s',traceback.format_exc())
+            if not sent:
+                try: s.send_error(500)
+                except OSError: pass
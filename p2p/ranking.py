@@ -0,0 +1,26 @@
+import threading
+class PeerRanker:
+    # ranking dos vizinhos por EWMA da latencia (ms) e da taxa de erro
+    # score = latencia/(1-erro): tempo esperado ate uma resposta boa
+    # p95 ~ media + 2*desvio (EWMA do desvio absoluto, como o RTO do TCP),
+    # usado como prazo antes de disparar o pedido de hedge no proximo peer
+    def __init__(s,peers,a=0.2,ms=50.0):
+        s.a=a; s.ms=ms; s.lk=threading.Lock()
+        s.lat={p:None for p in peers}; s.dev={p:0.0 for p in peers}; s.err={p:0.0 for p in peers}
+    def record(s,p,ms,ok=True):
+        a=s.a
+        with s.lk:
+            s.err[p]+=a*((0.0 if ok else 1.0)-s.err[p])
+            if ms is None: return
+            l=s.lat[p]
+            if l is None: s.lat[p]=ms; s.dev[p]=ms/2
+            else: s.dev[p]+=a*(abs(ms-l)-s.dev[p]); s.lat[p]=l+a*(ms-l)
+    def score(s,p):
+        l=s.lat[p]
+        return (0.0 if l is None else l)/(1-min(s.err[p],0.9))  # sem amostras: tenta primeiro
+    def p95(s,p):
+        l=s.lat[p]
+        return s.ms if l is None else l+2*s.dev[p]
+    def order(s,ps=None): return sorted(s.lat if ps is None else ps,key=s.score)
+    def stats(s):
+        return {p:{'lat_ms':s.lat[p],'p95_ms':s.p95(p),'erro':round(s.err[p],3)} for p in s.lat}
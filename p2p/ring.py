@@ -0,0 +1,22 @@
+import bisect, hashlib
+def _h(s): return int.from_bytes(hashlib.blake2b(s.encode(),digest_size=8).digest(),'little')
+class HashRing:
+    # hash consistente com v nos virtuais por peer: cada chave tem um peer dono
+    # (o primeiro no no sentido horario); entrar/sair um peer remapeia ~1/N das chaves
+    def __init__(s,nodes=(),v=100): s.v=v; s.pos=[]; s.own={}; [s.add(n) for n in nodes]
+    def __len__(s): return len(set(s.own.values()))
+    def add(s,n):
+        for i in range(s.v):
+            h=_h(f'{n}#{i}')
+            if h not in s.own: bisect.insort(s.pos,h); s.own[h]=n
+    def remove(s,n):
+        s.pos=[h for h in s.pos if s.own[h]!=n]; s.own={h:s.own[h] for h in s.pos}
+    def owners(s,key):
+        # peers distintos em ordem de preferencia para a chave (dono, depois sucessores)
+        if not s.pos: return
+        i=bisect.bisect(s.pos,_h(key)); seen=set()
+        for j in range(len(s.pos)):
+            n=s.own[s.pos[(i+j)%len(s.pos)]]
+            if n not in seen:
+                seen.add(n); yield n
+    def home(s,key): return next(s.owners(key),None)
@@ -0,0 +1,71 @@
+import threading, time
+import requests
+from requests.adapters import HTTPAdapter
+class PeerSessions:
+    # conexoes keep-alive com os vizinhos: uma requests.Session por peer com pool
+    # de ate n conexoes (alem disso abre e fecha na hora, sem bloquear), entao
+    # misses seguidos reaproveitam a conexao TCP aquecida em vez de abrir outra
+    # urllib3 ja e seguro com threads; uma thread fecha o pool de quem ficou
+    # t segundos sem pedidos (a proxima chamada abre de novo)
+    # trafego de fundo (bg=True: /digest, /health) usa o pool mas nao conta como
+    # uso, senao um vizinho sondado a cada poucos segundos nunca ficaria ocioso
+    # respostas com stream=True so devolvem a conexao ao pool depois de lidas ou fechadas
+    # opened conta cada connect() de verdade (o num_connections do urllib3 nao sobe
+    # quando ele reabre uma conexao do pool que o vizinho fechou, e isso e um socket novo)
+    def __init__(s,peers,n=8,t=30.0):
+        s.peers=dict(peers); s.n=n; s.t=t; s.lk=threading.Lock()
+        s.reqs={p:0 for p in s.peers}; s.opened={p:0 for p in s.peers}; s.reaped={p:0 for p in s.peers}
+        s.ss={p:s._session(p) for p in s.peers}; s.last={p:0.0 for p in s.peers}; s.used={p:False for p in s.peers}
+    def _counted(s,p,pl):
+        # classe de pool do urllib3 cujas conexoes somam em opened[p] a cada socket aberto
+        class Conn(pl.ConnectionCls):
+            def connect(c):
+                super().connect()
+                with s.lk: s.opened[p]+=1
+        return type(pl.__name__,(pl,),{'ConnectionCls':Conn})
+    def _session(s,p):
+        ss=requests.Session()
+        for sc in ('http','https'):
+            a=HTTPAdapter(pool_connections=1,pool_maxsize=s.n); pm=a.poolmanager
+            pm.pool_classes_by_scheme={k:s._counted(p,v) for k,v in pm.pool_classes_by_scheme.items()}
+            ss.mount(sc+'://',a)
+        return ss
+    def _pools(s,p):
+        for a in s.ss[p].adapters.values():
+            pm=a.poolmanager
+            for k in pm.pools.keys():
+                pl=pm.pools.get(k)
+                if pl is not None: yield pl
+    def _idle(s,p):
+        # conexoes abertas e ociosas (prontas para reuso) nos pools atuais do peer
+        idle=0
+        for pl in s._pools(p):
+            q=pl.pool
+            if q is not None: idle+=sum(c is not None and c.sock is not None for c in list(q.queue))
+        return idle
+    def request(s,p,method,path,bg=False,**kw):
+        with s.lk:
+            s.reqs[p]+=1; s.used[p]=True
+            if not bg: s.last[p]=time.time()
+        return s.ss[p].request(method,s.peers[p]+path,**kw)
+    def get(s,p,path,**kw): return s.request(p,'GET',path,**kw)
+    def post(s,p,path,**kw): return s.request(p,'POST',path,**kw)
+    def reap(s):
+        now=time.time()
+        for p in s.peers:
+            if s.used[p] and now-s.last[p]>s.t:
+                with s.lk: s.used[p]=False; s.reaped[p]+=1
+                s.ss[p].close()  # conexoes em uso sao fechadas quando voltarem
+    def _loop(s):
+        while True:
+            time.sleep(max(s.t/2,1)); s.reap()
+    def start(s):
+        threading.Thread(target=s._loop,daemon=True).start(); return s
+    def stats(s):
+        # pedidos, conexoes abertas desde o inicio, ociosas no pool agora e taxa de reuso
+        out={}
+        for p in s.peers:
+            opened=s.opened[p]
+            out[p]={'pedidos':s.reqs[p],'conexoes_abertas':opened,'ociosas':s._idle(p),'fechamentos_ociosos':s.reaped[p],
+                    'reuso':round(1-opened/s.reqs[p],3) if s.reqs[p] else None}
+        return out
@@ -3,48 +3,627 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
-from flask import Flask, send_file, abort
-import os, requests
+from flask import Flask, Response, send_file, abort, request, jsonify
+import os, time, random, mimetypes, threading, requests, asyncio, socket, signal
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.http import parse_range_header
+from werkzeug.serving import make_server
+try:
+    import aiohttp
+    from aiohttp import web
+except ImportError: aiohttp=None  # so o modo ASYNC=True precisa (pip install aiohttp)
 from cache.lru import LRUCache
 from cache.lfu import LFUCache
 from cache.green import GreenCache
+from cache.gdsf import GDSFCache
+from cache.arc import ARCCache
+from cache.fifo import ClockCache, S3FIFOCache
+from cache.tinylfu import TinyLFU
+from cache.sharded import ShardedCache
+from cache.shm import SharedCache
+from cache.zerocopy import zerocopy, stats as zc_stats
+from cache.singleflight import SingleFlight
+from cache.digest import CountingDigest
+from cache.journal import Journal
+from cache.memtier import MemTier
+from cache.fill import Fill, Pass, CHUNK, tmpname, recover, achunks
+from p2p.ranking import PeerRanker
+from p2p.hedge import hedged
+from p2p.health import PeerHealth
+from p2p.digests import DigestTable
+from p2p.ring import HashRing
+from p2p.hotspot import HotSpots
+from p2p.sessions import PeerSessions
+from p2p.keepalive import KeepAliveHandler
+from p2p.aio import ahedged, AsyncFlight
 
 PEER_NAME='peer1'
 PORT=5001
 REGION='Recife'
 POLICY='GREEN'
 CACHE_SIZE=2
+CACHE_BYTES=None  # ex.: 512*1024**2 -> capacidade em bytes (tamanho real dos arquivos) em vez de CACHE_SIZE arquivos
+FSYNC=False  # True -> fsync do arquivo e do diretorio antes de publicar cada preenchimento
+PERSIST=True  # metadados da politica (contagens, scores, recencia) sobrevivem a reinicios: snapshot + diario
+SNAPSHOT_EVERY=60  # segundos entre snapshots (o diario guarda os eventos do intervalo)
+MEM_BYTES=32*1024**2  # camada em memoria acima do disco para objetos pequenos e quentes (0 desliga)
+MEM_MAX=256*1024  # maior objeto que sobe para a memoria
+MEM_HITS=2  # acertos no disco ate subir para a memoria
+RANGE_CHUNK=1024*1024  # pedidos com Range sao guardados e buscados em pedacos desse tamanho
+ADMISSION=False  # True -> filtro W-TinyLFU na frente da politica (resiste a varreduras)
+SKETCH_KEYS=1<<16  # chaves acompanhadas pelo Count-Min (~4 bytes por chave)
+SHARDS=None  # politica em N shards com lock proprio (1 = um lock so, semantica exata); None -> 16 com PERSIST e >=10.000 objetos previstos (snapshot um shard por vez, sem pausa longa), senao 1
+MAX_HOPS=1  # saltos (pedidos repassados ao peer dono) que ainda podem buscar; sondagens only-if-cached nunca buscam
+PLACEMENT=None  # None: cada peer guarda o que passa por ele; 'PROXY'/'SHORT': hash consistente define o peer dono
+SHORT_TTL=30  # segundos de vida da copia local em PLACEMENT='SHORT'
+FETCH_MODE='HEDGE'  # HEDGE: peer mais rapido primeiro, o proximo so apos o p95 dele; PARALLEL: todos juntos
+BREAKER_FAILS=3  # falhas seguidas que abrem o circuito de um vizinho
+HEALTH_EVERY=5  # segundos entre sondagens /health dos vizinhos com circuito aberto
+DIGEST_KEYS=None  # objetos previstos no digest (Bloom de 8 bits por objeto: 1 KB por 1.000); None -> pela capacidade do cache
+DIGEST_OBJ=64*1024  # tamanho medio presumido dos objetos para prever quantos cabem em CACHE_BYTES
+DIGEST_EVERY=10  # segundos entre atualizacoes dos digests dos vizinhos
+HOT_RATE=50  # pedidos/s (janela de 10 s) a partir dos quais um arquivo e replicado
+REPLICAS=2  # peers extras que recebem copia de um arquivo quente
+REPLICA_TTL=60  # segundos de vida de uma replica sem demanda
+REPLICA_SHARE=0.1  # fracao da capacidade que as replicas podem ocupar (dentro dela entram mesmo com o cache cheio)
+POOL_SIZE=8  # conexoes keep-alive guardadas por vizinho
+POOL_IDLE=30  # segundos sem pedidos ate fechar as conexoes de um vizinho
+ASYNC=False  # True -> servidor asyncio (aiohttp) no lugar do Flask: clientes lentos nao prendem uma thread cada
+WORKERS=1  # >1 -> N processos na mesma porta com um cache so: politica (LRU/LFU/GREEN) numa tabela em memoria compartilhada
+SHARED_SLOTS=1<<16  # entradas maximas da tabela compartilhada com CACHE_BYTES (sem ele: 2x CACHE_SIZE)
+ZEROCOPY=True  # acertos no disco saem por os.sendfile (kernel -> socket) em vez de blocos copiados pelo Python
 PEERS={'peer2': 'http://localhost:5002', 'peer3': 'http://localhost:5003'}
 
 BASE=os.path.dirname(__file__)
 CACHE=os.path.join(BASE,'cache')
 ORIGIN=os.path.abspath(os.path.join(BASE,'..','origin','files'))
-os.makedirs(CACHE,exist_ok=True)
-cache = LRUCache(CACHE_SIZE) if POLICY=='LRU' else (LFUCache(CACHE_SIZE) if POLICY=='LFU' else GreenCache(CACHE_SIZE,REGION))
+CHUNKS=os.path.join(BASE,'chunks')  # pedacos de objetos pedidos com Range (f#i) e tamanho total de cada objeto (f#tamanho)
+os.makedirs(CACHE,exist_ok=True); os.makedirs(CHUNKS,exist_ok=True)
+CAP=CACHE_BYTES or CACHE_SIZE
+OBJS=CACHE_BYTES//DIGEST_OBJ if CACHE_BYTES else CACHE_SIZE  # objetos previstos no cache
+NSH=SHARDS or (16 if PERSIST and OBJS>=10_000 else 1)
+def mk(c): return {'LRU':LRUCache,'LFU':LFUCache,'GDSF':GDSFCache,'ARC':ARCCache,'CLOCK':ClockCache,'S3FIFO':S3FIFOCache}.get(POLICY,lambda c: GreenCache(c,REGION))(c)
+def pol(c): return TinyLFU(mk,c,SKETCH_KEYS//NSH) if ADMISSION else mk(c)
+META=os.path.join(BASE,'meta')  # snapshot + diario da politica (fora de CACHE)
+TAG=(POLICY,CAP,bool(CACHE_BYTES),ADMISSION,SKETCH_KEYS,NSH,WORKERS,REGION)  # estado salvo com outra configuracao e descartado
+MULTI=WORKERS>1 and __name__=='__main__'
+def fresh(): return ShardedCache(pol,CAP,NSH)
+if MULTI:
+    # tabela criada no mestre antes do fork; politicas sem versao em tabela caem para LRU
+    cache=SharedCache(CAP,POLICY if POLICY in ('LRU','LFU','GREEN') else 'LRU',REGION,SHARED_SLOTS if CACHE_BYTES else 2*CAP)
+    if PERSIST: os.makedirs(META,exist_ok=True); cache.load(os.path.join(META,'tabela'),TAG)
+else:
+    # compartilhado pelas threads do Flask
+    cache=Journal(META,fresh,TAG).start(SNAPSHOT_EVERY) if PERSIST else fresh()
 app=Flask(__name__)
+if ZEROCOPY: app.wsgi_app=zerocopy(app.wsgi_app)
 def cp(f): return os.path.join(CACHE,f)
-@app.route('/file/<f>')
-def getf(f):
-    if os.path.exists(cp(f)):
-        cache.access(f); 
-        print(f"[{PEER_NAME}] ACERTO LOCAL (cache) -> {f}"); 
-        return send_file(cp(f))
-    for p,u in PEERS.items():
+def mime(f): return mimetypes.guess_type(f)[0] or 'application/octet-stream'
+def ck(f,i): return f'{f}/{i}'  # chave do pedaco i de f ('/' nunca aparece no nome de um arquivo; '#' pode, via %23)
+def kp(k):
+    # caminho de uma chave: pedaco (tem '/') -> CHUNKS/f#i, arquivo inteiro -> CACHE/f
+    f,_,i=k.rpartition('/')
+    return os.path.join(CHUNKS,f'{f}#{i}') if f else cp(k)
+def zp(f): return os.path.join(CHUNKS,f+'#tamanho')  # tamanho total de f, ao lado dos pedacos
+mem=MemTier(MEM_BYTES,MEM_MAX,MEM_HITS)
+flight=SingleFlight()
+digest=CountingDigest(DIGEST_KEYS or OBJS,shared=MULTI)  # o que este peer tem em CACHE e CHUNKS, servido em /digest
+short={}  # copias de curta duracao (PLACEMENT='SHORT' e replicas), tambem na politica: arquivo -> expira em
+replicas={}  # replicas aceitas (em andamento ou no cache): arquivo -> tamanho, limitado por REPLICA_SHARE
+sizes={}  # tamanho total dos objetos que tem pedacos em CHUNKS (arquivo CHUNKS/<f>#tamanho)
+def size_of(f):
+    try:
+        with open(zp(f)) as fh: return int(fh.read())
+    except FileNotFoundError: return None
+def unlink(k):
+    # apaga do disco (e da memoria e do digest) um arquivo ou pedaco expulso pela politica
+    mem.drop(k)
+    try: os.remove(kp(k))
+    except FileNotFoundError: return  # outro worker ja apagou
+    digest.remove(k); short.pop(k,None); replicas.pop(k,None)
+    f=k.rpartition('/')[0]
+    if f:
+        # saiu o ultimo pedaco de f (a politica, comum a todos os workers, nao tem outro): some o tamanho
+        n=sizes.get(f) or size_of(f)
+        if n is None or any(ck(f,i) in cache for i in range(-(-n//RANGE_CHUNK))): return
+        sizes.pop(f,None)
+        try: os.remove(zp(f))
+        except FileNotFoundError: pass
+parts=[]; totals=[]
+for name,n in recover(CHUNKS):
+    # nomes em CHUNKS: f#<i> (pedaco) ou f#tamanho; o que vem depois do ultimo '#' diz o tipo
+    f,_,i=name.rpartition('#')
+    if f and i.isdigit(): parts.append((ck(f,int(i)),n))
+    elif f and i=='tamanho': totals.append(f)
+    else: os.remove(os.path.join(CHUNKS,name))  # formato antigo ou desconhecido
+owned={k.rpartition('/')[0] for k,n in parts}
+for f in totals:
+    if f not in owned: os.remove(zp(f)); continue  # tamanho sem nenhum pedaco
+    sizes[f]=size_of(f)
+found=recover(CACHE)+parts
+have={name for name,n in found}
+for k in cache.keys():
+    # politica restaurada lembra de arquivos que sumiram do disco: saem antes de tudo
+    if k not in have: cache.remove(k)
+for name,n in found:
+    # partida: apaga preenchimentos pela metade; arquivos e pedacos que a politica
+    # restaurada ja conhece ficam como estao, os outros entram (mais antigo primeiro)
+    digest.add(name)
+    if name in cache: continue
+    for ev in cache.insert(name,n if CACHE_BYTES else 1): unlink(ev)
+digest.grow(cache.keys)  # mais objetos no disco que o previsto (no modo MULTI ainda e antes do fork)
+if MULTI:
+    # pre-fork: o mestre ja restaurou a tabela e varreu o disco; cada filho herda
+    # tabela, digest e socket e segue carregando este modulo (threads, vizinhos,
+    # camada em memoria sao por processo); o mestre so grava o snapshot da tabela
+    sock=socket.create_server(('127.0.0.1',PORT)); sock.set_inheritable(True); kids=[]
+    for _ in range(WORKERS):
+        pid=os.fork()
+        if pid==0: kids=None; break
+        kids.append(pid)
+    if kids is not None:
+        print(f"[{PEER_NAME}] {WORKERS} workers na porta {PORT}: {kids}")
+        signal.signal(signal.SIGTERM,signal.default_int_handler)  # kill tambem grava a tabela e derruba os workers
         try:
-            r=requests.get(u+'/file/'+f,timeout=10)
-            if r.status_code==200:
-                print(f"[{PEER_NAME}] ACERTO REMOTO (recebido de {p}) -> {f}")
-                open(cp(f),'wb').write(r.content)
-                ev=cache.insert(f)
-                if ev and os.path.exists(cp(ev)): os.remove(cp(ev))
-                return send_file(cp(f))
-        except: pass
+            while True:
+                time.sleep(SNAPSHOT_EVERY)
+                if PERSIST: cache.dump(os.path.join(META,'tabela'),TAG)
+        except KeyboardInterrupt: pass
+        finally:
+            for pid in kids:
+                try: os.kill(pid,signal.SIGTERM)
+                except ProcessLookupError: pass
+            if PERSIST: cache.dump(os.path.join(META,'tabela'),TAG)
+        sys.exit(0)
+def store(f,fl,ms):
+    # registra f (arquivo ou pedaco) na politica com o tamanho real, apaga as vitimas
+    # e publica no nome do cache; se f nao couber, o tmp some quando o ultimo leitor terminar
+    # ms = custo de buscar de novo, usado pelo GDSF: tempo ate o primeiro byte do
+    # vizinho ou para achar o arquivo na origem (nao cresce com o tamanho do objeto)
+    n=fl.n if CACHE_BYTES else 1
+    evs=cache.insert(f,n,ms) if POLICY=='GDSF' else cache.insert(f,n)
+    for ev in evs:
+        if ev!=f: unlink(ev)
+    if f in evs: fl.discard(); return False
+    fl.commit(kp(f)); digest.add(f)
+    if not MULTI: digest.grow(cache.keys)
+    return True
+filling={}  # arquivo -> Fill em andamento (leitores novos se juntam a ele)
+def length(r):
+    v=r.headers.get('Content-Length')
+    return int(v) if v else None
+def chunks(path):
+    with open(path,'rb') as fh:
+        while b:=fh.read(CHUNK): yield b
+def charge(n):
+    # com CACHE_BYTES o preenchimento em andamento ja ocupa o orcamento (abre espaco
+    # antes de gravar, nao so no commit); n<0 devolve a reserva
+    if CACHE_BYTES and n:
+        for ev in cache.reserve(n): unlink(ev)
+def publish(f,fl,ttl,ms):
+    # fim da busca: entra na politica (conta no orcamento); copia curta (ttl) ainda expira sozinha
+    fl.close()
+    if store(f,fl,ms) and ttl: short[f]=time.time()+ttl
+    fl.finish()
+def pump(f,fl,it,ttl,ms):
+    # grava os chunks da fonte no Fill e publica; quem estiver lendo recebe o
+    # erro se a fonte falhar. reserva Content-Length no orcamento antes do primeiro
+    # byte; sem ele, cobra o que ja esta no disco a cada chunk
+    held=0
+    try:
+        charge(fl.size or 0); held=fl.size or 0
+        for b in it:
+            fl.write(b)
+            if fl.n>held: charge(fl.n-held); held=fl.n
+        charge(-held); held=0
+        publish(f,fl,ttl,ms)
+    except Exception as e:
+        print(f"[{PEER_NAME}] ERRO NA BUSCA -> {f}: {e}")
+        fl.finish(e); fl.discard()
+    finally:
+        charge(-held); filling.pop(f,None)
+        if f not in short: replicas.pop(f,None)  # replica que nao entrou devolve a cota
+def oversize(size): return CACHE_BYTES and size is not None and size>cache.c
+def start(f,it,size,ttl=None,ms=0):
+    if oversize(size): return Pass(it,size)  # nao cabe nem com o cache vazio: vai da fonte ao cliente sem tee
+    fl=Fill(tmpname(cp(f)),size,FSYNC); filling[f]=fl
+    threading.Thread(target=pump,args=(f,fl,it,ttl,ms),daemon=True).start()
+    return fl
+rank=PeerRanker(PEERS)
+conns=PeerSessions(PEERS,POOL_SIZE,POOL_IDLE).start()  # todo trafego entre peers passa por aqui (keep-alive)
+pool=ThreadPoolExecutor(max_workers=4*max(len(PEERS),1))
+def ping(p): return conns.get(p,'/health',bg=True,timeout=1).status_code==200
+health=PeerHealth(PEERS,ping,BREAKER_FAILS,HEALTH_EVERY).start()
+def pull(p):
+    r=conns.get(p,'/digest',bg=True,timeout=2); r.raise_for_status()
+    return r.content,int(r.headers.get('X-Digest-K',6))
+digests=DigestTable(PEERS,pull,DIGEST_EVERY).start()
+ring=HashRing([PEER_NAME,*PEERS])
+hot=HotSpots()
+pushed={}  # arquivo -> quando foi replicado pela ultima vez
+def owner(f,vis):
+    # peer dono de f no anel; se o dono esta fora (circuito aberto) ou ja passou
+    # pelo pedido, o proximo do anel assume, entao so as chaves dele mudam de lugar
+    for p in ring.owners(f):
+        if p==PEER_NAME or (p not in vis and health.up(p)): return p
+    return PEER_NAME
+def holder(f,vis):
+    # dono de f ou, se houver, uma das replicas dele (sucessores no anel cujo
+    # digest mostra o arquivo), sorteada para espalhar a carga de um arquivo quente
+    home=owner(f,vis)
+    ps=[p for p in list(ring.owners(f))[:1+REPLICAS] if p!=PEER_NAME and p not in vis and health.up(p)
+        and (p==home or (p in digests.d and f in digests.d[p]))]
+    return random.choice(ps) if ps else home
+def spread(f):
+    # arquivo quente: pede aos proximos REPLICAS peers do anel que puxem uma copia
+    now=time.time()
+    if now-pushed.get(f,0)<REPLICA_TTL/2: return
+    pushed[f]=now
+    for p in [p for p in ring.owners(f) if p!=PEER_NAME and health.up(p)][:REPLICAS]:
+        if p in digests.d and f in digests.d[p]: continue
+        print(f"[{PEER_NAME}] REPLICANDO (quente) -> {f} em {p}")
+        pool.submit(conns.post,p,'/replicate/'+f,headers={'X-From':PEER_NAME},timeout=10)
+def served(f):
+    # conta o pedido; arquivo quente e replicado, copia curta quente tem a vida renovada
+    r=hot.hit(f)
+    if f in short and r>=HOT_RATE/2: short[f]=max(short[f],time.time()+REPLICA_TTL)
+    if r>=HOT_RATE: spread(f)
+def forward(f,p,hops,vis,stream=False):
+    # pedido completo (pode buscar) ao peer dono
+    h={'X-Region':REGION,'X-Hops':str(hops+1),'X-Visited':','.join(vis|{PEER_NAME})}
+    try: r=conns.get(p,'/file/'+f,headers=h,timeout=10,stream=stream)
+    except requests.RequestException as e: health.fail(p,type(e).__name__); return None
+    if r.status_code==200: return r
+    r.close(); return None
+def expire():
+    now=time.time()
+    for f,t in list(short.items()):
+        if t<now and short.pop(f,None) is not None: cache.remove(f); unlink(f)
+def reaper():
+    # copias curtas e replicas vencidas saem tambem num peer que so atende acertos
+    while True:
+        time.sleep(1); expire()
+threading.Thread(target=reaper,daemon=True).start()
+def origin(f):
+    # f na origem: (caminho, tamanho, ms para achar o arquivo = custo do GDSF) ou None
+    of=os.path.join(ORIGIN,f); t0=time.perf_counter()
+    try: n=os.path.getsize(of)
+    except OSError: return None
+    return of,n,(time.perf_counter()-t0)*1000
+def probe(f,p,h):
+    # um pedido a um vizinho; devolve (peer, resposta, ms) se ele tinha f
+    t0=time.perf_counter()
+    try: r=conns.get(p,'/file/'+f,headers=h,timeout=10,stream=True)
+    except requests.RequestException as e:
+        rank.record(p,None,False); health.fail(p,type(e).__name__); return None
+    ms=(time.perf_counter()-t0)*1000; good=r.status_code<500 or r.status_code==504
+    rank.record(p,ms,good)
+    if good: health.ok(p)
+    else: health.fail(p,f'HTTP {r.status_code}')
+    if r.status_code in (200,206): return p,r,ms
+    r.close(); return None
+def begin(f,hops,vis):
+    # busca f nos vizinhos e depois na origem; roda uma vez por chave mesmo com
+    # muitos pedidos simultaneos (flight), os demais leem do mesmo Fill
+    # vizinhos so respondem do cache local (only-if-cached), entao um miss frio
+    # custa uma rodada de sondagens + uma leitura na origem, sem recursao na malha
+    # sondagens com hedge/paralelas na ordem do ranking: vence a primeira resposta boa
+    # a transferencia e em chunks (stream), gravada no disco enquanto e servida
+    home=owner(f,vis) if PLACEMENT=='SHORT' else PEER_NAME
+    if home!=PEER_NAME:
+        t0=time.perf_counter(); r=forward(f,home,hops,vis,stream=True)
+        if r is not None:
+            print(f"[{PEER_NAME}] COPIA CURTA (dono {home}) -> {f}")
+            return start(f,r.iter_content(CHUNK),length(r),SHORT_TTL,(time.perf_counter()-t0)*1000)
+    h={'X-Region':REGION,'Cache-Control':'only-if-cached','X-Hops':str(hops+1),'X-Visited':','.join(vis|{PEER_NAME})}
+    # circuito aberto: nem tenta; digest diz que nao tem: nem pergunta
+    ps=rank.order([p for p in digests.candidates(health.alive(PEERS),f) if p not in vis])
+    res=hedged(pool,ps,lambda p: probe(f,p,h),(lambda p: 0) if FETCH_MODE=='PARALLEL' else (lambda p: rank.p95(p)/1000),lambda x: x[1].close())
+    if res:
+        p,r,ms=res
+        print(f"[{PEER_NAME}] ACERTO REMOTO (recebido de {p}) -> {f}")
+        return start(f,r.iter_content(CHUNK),length(r),ms=ms)
+    o=origin(f)
+    if o:
+        print(f"[{PEER_NAME}] FALHA NO CACHE (busca na origem) -> {f}")
+        return start(f,chunks(o[0]),o[1],ms=o[2])
+    return None
+def piece(f,i):
+    # pedaco i de f: do disco, senao buscado uma vez so (flight) num vizinho ou na origem
+    k=ck(f,i)
+    try:
+        with open(kp(k),'rb') as fh: b=fh.read()
+        cache.access(k); return b
+    except FileNotFoundError: pass
+    with flight.do(k,lambda: fetch_piece(f,i)) as b: return b
+def fetch_piece(f,i):
+    # pede so os bytes do pedaco (Range) a quem provavelmente tem f inteiro ou o
+    # pedaco, senao le da origem; guarda como entrada propria da politica e
+    # aprende o tamanho total do objeto. devolve os bytes ou None
+    k=ck(f,i); a=i*RANGE_CHUNK
+    h={'X-Region':REGION,'Cache-Control':'only-if-cached','X-Hops':'1','X-Visited':PEER_NAME,'Range':f'bytes={a}-{a+RANGE_CHUNK-1}'}
+    ps=rank.order([p for p in health.alive(PEERS) if digests.maybe(p,f) or digests.maybe(p,k)])
+    res=hedged(pool,ps,lambda p: probe(f,p,h),(lambda p: 0) if FETCH_MODE=='PARALLEL' else (lambda p: rank.p95(p)/1000),lambda x: x[1].close())
+    if res and res[1].status_code!=206: res[1].close(); res=None
+    if res:
+        p,r,ms=res; b=r.content; n=int(r.headers['Content-Range'].rsplit('/',1)[1])
+        print(f"[{PEER_NAME}] ACERTO REMOTO (recebido de {p}) -> {f} pedaco {i}")
+    else:
+        o=origin(f)
+        if not o: return None
+        of,n,ms=o
+        with open(of,'rb') as fh: fh.seek(a); b=fh.read(RANGE_CHUNK)
+        print(f"[{PEER_NAME}] FALHA NO CACHE (busca na origem) -> {f} pedaco {i}")
+    if sizes.get(f)!=n or not os.path.exists(zp(f)):
+        fl=Fill(tmpname(zp(f)),sync=FSYNC); fl.write(str(n).encode()); fl.close(); fl.commit(zp(f))
+        sizes[f]=n
+    if not b: return None
+    fl=Fill(tmpname(kp(k)),len(b),FSYNC); fl.write(b); fl.close()
+    store(k,fl,ms)
+    return b
+def total(f):
+    # tamanho de f sem baixar bytes: HEAD num vizinho que provavelmente tem f inteiro, senao stat na origem
+    h={'Cache-Control':'only-if-cached','X-Hops':'1','X-Visited':PEER_NAME,'X-Region':REGION}
+    for p in rank.order([p for p in health.alive(PEERS) if digests.maybe(p,f)]):
+        try: r=conns.request(p,'HEAD','/file/'+f,headers=h,timeout=5)
+        except requests.RequestException: continue
+        if r.status_code==200 and length(r) is not None: return length(r)
     of=os.path.join(ORIGIN,f)
-    if os.path.exists(of):
+    return os.path.getsize(of) if os.path.exists(of) else None
+def span(f,want,only):
+    # resolve o Range de f contra os pedacos: (inicio, fim exclusivo, cabecalhos) ou o status de erro
+    n=sizes.get(f)
+    if n is None:
+        if only: return 504
+        n=total(f)
+        if n is None: return 404
+    rr=want.range_for_length(n)
+    if rr is None: return 416
+    a,z=rr
+    if only and not all(os.path.exists(kp(ck(f,i))) for i in range(a//RANGE_CHUNK,(z-1)//RANGE_CHUNK+1)): return 504
+    print(f"[{PEER_NAME}] INTERVALO -> {f} bytes {a}-{z-1}")
+    return a,z,{'Content-Range':f'bytes {a}-{z-1}/{n}','Content-Length':str(z-a),'Accept-Ranges':'bytes','Content-Type':mime(f)}
+def pieces(f,a,z):
+    for i in range(a//RANGE_CHUNK,(z-1)//RANGE_CHUNK+1):
+        b=piece(f,i)
+        if b is None: return  # a fonte sumiu no meio: o cliente ve a resposta curta
+        yield b[max(a-i*RANGE_CHUNK,0):z-i*RANGE_CHUNK]
+def ranged(f,want,only):
+    # Range sem o arquivo inteiro aqui: responde 206 montando o intervalo com os
+    # pedacos de RANGE_CHUNK bytes, buscando so os que faltam; um salto para o
+    # minuto 40 de um video custa os pedacos vistos, nao o arquivo todo
+    sp=span(f,want,only)
+    if isinstance(sp,int): abort(sp)
+    a,z,hd=sp
+    return Response(pieces(f,a,z),206,headers=hd)
+@app.route('/file/<f>')
+def getf(f):
+    rg=request.headers.get('X-Region',REGION)
+    hops=int(request.headers.get('X-Hops',0))
+    vis=set(filter(None,request.headers.get('X-Visited','').split(',')))
+    only='only-if-cached' in request.headers.get('Cache-Control','') or hops>MAX_HOPS or PEER_NAME in vis
+    if f in short and short[f]<time.time(): expire()
+    b=mem.get(f)
+    if b is not None or os.path.exists(cp(f)):
+        # pedido de um vizinho conta como demanda da regiao dele (GREEN)
+        if rg!=REGION and hasattr(cache,'demand'): cache.demand(f,rg)
+        else: cache.access(f)
+        served(f)
+        if b is not None:
+            print(f"[{PEER_NAME}] ACERTO LOCAL (memoria) -> {f}")
+            rv=Response(b,mimetype=mime(f))
+            return rv.make_conditional(request,accept_ranges=True,complete_length=len(b))  # Range -> 206
+        print(f"[{PEER_NAME}] ACERTO LOCAL (cache) -> {f}")
+        mem.hit(f,cp(f))
+        try: return send_file(cp(f))  # com Range o Flask ja responde 206 com o intervalo
+        except FileNotFoundError: pass  # outro worker/thread acabou de expulsar f: segue como miss
+    want=request.range
+    if want and want.units=='bytes' and len(want.ranges)==1: return ranged(f,want,only)
+    if only: abort(504)  # sondagem de vizinho: nao esta aqui, nao busca em ninguem
+    if PLACEMENT=='PROXY':
+        home=holder(f,vis)
+        if home!=PEER_NAME:
+            r=forward(f,home,hops,vis,stream=True)
+            if r is not None:
+                print(f"[{PEER_NAME}] REPASSE ({home}) -> {f}")
+                return Response(r.iter_content(CHUNK),mimetype=r.headers.get('Content-Type'))
+    fl=None
+    for _ in range(2):
+        if isinstance(fl,Pass): fl=begin(f,hops,vis)  # passagem sem tee ja tomada por quem chegou junto: busca propria
+        else:
+            fl=filling.get(f)
+            if fl is None:
+                with flight.do(f,lambda: begin(f,hops,vis)) as fl: pass
+        if fl is None: abort(404)
+        try: rd=fl.reader()
+        except FileNotFoundError: continue  # terminou e saiu do cache nesse meio tempo
+        served(f)
+        hd={'Content-Length':str(fl.size)} if fl.size is not None else {}
+        return Response(rd,mimetype=mime(f),headers=hd)
+    abort(503)
+def replica(f,src):
+    # um vizinho com f quente pede uma replica: puxa dele e guarda por REPLICA_TTL
+    # replicas tem uma cota de REPLICA_SHARE da capacidade: dentro dela entram
+    # expulsando pela politica (cache cheio e o normal), fora dela 507
+    if src not in PEERS: return 400
+    if os.path.exists(cp(f)) or f in filling: return 204
+    full=[]
+    def pull_replica():
+        t0=time.perf_counter(); r=conns.get(src,'/file/'+f,headers={'Cache-Control':'only-if-cached','X-Visited':PEER_NAME},timeout=10,stream=True)
+        if r.status_code!=200: r.close(); return None
+        n=length(r) if CACHE_BYTES else 1
+        # a primeira replica sempre cabe na cota (com CACHE_SIZE pequeno a cota nao chega a um arquivo)
+        if n is None or n>cache.c or replicas and sum(replicas.values())+n>REPLICA_SHARE*cache.c: r.close(); full.append(f); return None
+        replicas[f]=n
+        print(f"[{PEER_NAME}] REPLICA (de {src}) -> {f}")
+        return start(f,r.iter_content(CHUNK),length(r),REPLICA_TTL,(time.perf_counter()-t0)*1000)
+    with flight.do(f,pull_replica) as fl: return 201 if fl else 507 if full else 502
+def peers_state():
+    # estado de cada vizinho: circuito (e motivo), latencia/erro do ranking e pool de conexoes
+    r=rank.stats(); d=digests.stats(); c=conns.stats()
+    return {p:dict(v,**r[p],digest=d.get(p),conexoes=c[p]) for p,v in health.stats().items()}
+def hot_state():
+    # arquivos mais pedidos agora (pedidos/s), copias curtas/replicas locais e a camada em memoria
+    return dict(quentes=hot.top(),copias={f:round(t-time.time()) for f,t in short.items()},memoria=mem.stats(),sendfile=zc_stats)
+@app.route('/replicate/<f>',methods=['POST'])
+def replicate(f): return '',replica(f,request.headers.get('X-From'))
+@app.route('/health')
+def healthz(): return jsonify(peer=PEER_NAME,ok=True)
+@app.route('/peers')
+def peers(): return jsonify(peers_state())
+@app.route('/hot')
+def hotlist(): return jsonify(hot_state())
+@app.route('/digest')
+def getdigest():
+    # filtro de Bloom das chaves em CACHE, puxado periodicamente pelos vizinhos
+    return Response(digest.bits(),mimetype='application/octet-stream',headers={'X-Digest-K':str(digest.k)})
+# modo asyncio (ASYNC=True): a mesma API servida pelo aiohttp; sondagens, repasses,
+# leitura da origem e streaming para o cliente sao corrotinas, entao um cliente lento
+# ou um vizinho que demora ocupa um socket e alguns KB, nao uma thread
+# politica, Fill, digest e vizinhos sao os mesmos objetos do modo Flask; pedacos de
+# Range e replicas ainda usam o caminho com requests, rodando no executor
+asess=None  # aiohttp.ClientSession, aberta dentro do loop
+aflight=AsyncFlight()
+tasks=set()  # preenchimentos em andamento (referencia forte ate terminarem)
+async def aprobe(f,p,h):
+    # probe() sem thread: (peer, resposta, ms) se o vizinho tinha f
+    t0=time.perf_counter()
+    try: r=await asess.get(PEERS[p]+'/file/'+f,headers=h)
+    except (aiohttp.ClientError,asyncio.TimeoutError) as e:
+        rank.record(p,None,False); health.fail(p,type(e).__name__); return None
+    ms=(time.perf_counter()-t0)*1000; good=r.status<500 or r.status==504
+    rank.record(p,ms,good)
+    if good: health.ok(p)
+    else: health.fail(p,f'HTTP {r.status}')
+    if r.status in (200,206): return p,r,ms
+    r.release(); return None
+async def aforward(f,p,hops,vis):
+    h={'X-Region':REGION,'X-Hops':str(hops+1),'X-Visited':','.join(vis|{PEER_NAME})}
+    try: r=await asess.get(PEERS[p]+'/file/'+f,headers=h)
+    except (aiohttp.ClientError,asyncio.TimeoutError) as e: health.fail(p,type(e).__name__); return None
+    if r.status==200: return r
+    r.release(); return None
+async def apump(f,fl,it,ttl,ms):
+    held=0
+    try:
+        await asyncio.to_thread(charge,fl.size or 0); held=fl.size or 0
+        async for b in it:
+            await asyncio.to_thread(fl.write,b)
+            if fl.n>held: await asyncio.to_thread(charge,fl.n-held); held=fl.n
+        await asyncio.to_thread(charge,-held); held=0
+        await asyncio.to_thread(publish,f,fl,ttl,ms)
+    except Exception as e:
+        print(f"[{PEER_NAME}] ERRO NA BUSCA -> {f}: {e}")
+        fl.finish(e); fl.discard()
+    finally:
+        if held: await asyncio.to_thread(charge,-held)
+        filling.pop(f,None)
+        if f not in short: replicas.pop(f,None)
+def astart(f,it,size,ttl=None,ms=0):
+    if oversize(size): return Pass(it,size)
+    fl=Fill(tmpname(cp(f)),size,FSYNC); filling[f]=fl
+    t=asyncio.ensure_future(apump(f,fl,it,ttl,ms)); tasks.add(t); t.add_done_callback(tasks.discard)
+    return fl
+async def abegin(f,hops,vis):
+    # begin() com corrotinas: mesma ordem (dono em SHORT, vizinhos com hedge, origem)
+    home=owner(f,vis) if PLACEMENT=='SHORT' else PEER_NAME
+    if home!=PEER_NAME:
+        t0=time.perf_counter(); r=await aforward(f,home,hops,vis)
+        if r is not None:
+            print(f"[{PEER_NAME}] COPIA CURTA (dono {home}) -> {f}")
+            return astart(f,r.content.iter_chunked(CHUNK),r.content_length,SHORT_TTL,(time.perf_counter()-t0)*1000)
+    h={'X-Region':REGION,'Cache-Control':'only-if-cached','X-Hops':str(hops+1),'X-Visited':','.join(vis|{PEER_NAME})}
+    ps=rank.order([p for p in digests.candidates(health.alive(PEERS),f) if p not in vis])
+    res=await ahedged(ps,lambda p: aprobe(f,p,h),(lambda p: 0) if FETCH_MODE=='PARALLEL' else (lambda p: rank.p95(p)/1000),lambda x: x[1].release())
+    if res:
+        p,r,ms=res
+        print(f"[{PEER_NAME}] ACERTO REMOTO (recebido de {p}) -> {f}")
+        return astart(f,r.content.iter_chunked(CHUNK),r.content_length,ms=ms)
+    o=origin(f)
+    if o:
         print(f"[{PEER_NAME}] FALHA NO CACHE (busca na origem) -> {f}")
-        open(cp(f),'wb').write(open(of,'rb').read())
-        ev=cache.insert(f)
-        if ev and os.path.exists(cp(ev)): os.remove(cp(ev))
-        return send_file(cp(f))
-    abort(404)
-if __name__=='__main__': app.run(port=PORT)
+        return astart(f,achunks(o[0]),o[1],ms=o[2])
+    return None
+async def relay(req,it,status=200,headers=None):
+    # manda um iteravel assincrono em chunks; o write espera o socket (memoria constante)
+    resp=web.StreamResponse(status=status,headers=headers)
+    try:
+        await resp.prepare(req)
+        async for b in it: await resp.write(b)
+        await resp.write_eof()
+    finally:
+        if hasattr(it,'aclose'): await it.aclose()
+    return resp
+async def afile(req):
+    f=req.match_info['f']; hd=req.headers
+    if '/' in f: return web.Response(status=404)  # %2F: o aiohttp entrega '/' em {f}, que e a marca das chaves de pedaco
+    rg=hd.get('X-Region',REGION)
+    hops=int(hd.get('X-Hops',0))
+    vis=set(filter(None,hd.get('X-Visited','').split(',')))
+    only='only-if-cached' in hd.get('Cache-Control','') or hops>MAX_HOPS or PEER_NAME in vis
+    if f in short and short[f]<time.time(): expire()
+    b=mem.get(f); want=parse_range_header(hd.get('Range'))
+    if b is not None or os.path.exists(cp(f)):
+        if rg!=REGION and hasattr(cache,'demand'): cache.demand(f,rg)
+        else: cache.access(f)
+        served(f)
+        if b is not None and want is None:
+            print(f"[{PEER_NAME}] ACERTO LOCAL (memoria) -> {f}")
+            return web.Response(body=b,content_type=mime(f))
+        print(f"[{PEER_NAME}] ACERTO LOCAL (cache) -> {f}")
+        mem.hit(f,cp(f))
+        return web.FileResponse(cp(f))  # sendfile do kernel; Range -> 206
+    if want and want.units=='bytes' and len(want.ranges)==1:
+        sp=await asyncio.to_thread(span,f,want,only)
+        if isinstance(sp,int): return web.Response(status=sp)
+        a,z,h=sp; it=pieces(f,a,z)
+        async def body():
+            while (b:=await asyncio.to_thread(next,it,None)) is not None: yield b
+        return await relay(req,body(),206,h)
+    if only: return web.Response(status=504)
+    if PLACEMENT=='PROXY':
+        home=holder(f,vis)
+        if home!=PEER_NAME:
+            r=await aforward(f,home,hops,vis)
+            if r is not None:
+                print(f"[{PEER_NAME}] REPASSE ({home}) -> {f}")
+                try: return await relay(req,r.content.iter_chunked(CHUNK),headers={'Content-Type':r.headers.get('Content-Type',mime(f))})
+                finally: r.release()
+    fl=None
+    for _ in range(2):
+        if isinstance(fl,Pass): fl=await abegin(f,hops,vis)  # passagem sem tee ja tomada: busca propria
+        else:
+            fl=filling.get(f)
+            if fl is None: fl=await aflight.do(f,lambda: abegin(f,hops,vis))
+        if fl is None: return web.Response(status=404)
+        try: rd=fl.areader()
+        except FileNotFoundError: continue  # terminou e saiu do cache nesse meio tempo
+        served(f)
+        h={'Content-Type':mime(f)}
+        if fl.size is not None: h['Content-Length']=str(fl.size)
+        return await relay(req,rd,headers=h)
+    return web.Response(status=503)
+async def areplicate(req):
+    f=req.match_info['f']
+    if '/' in f: return web.Response(status=404)
+    return web.Response(status=await asyncio.to_thread(replica,f,req.headers.get('X-From')))
+async def ahealth(req): return web.json_response(dict(peer=PEER_NAME,ok=True))
+async def apeers(req): return web.json_response(peers_state())
+async def ahot(req): return web.json_response(hot_state())
+async def adigest(req): return web.Response(body=digest.bits(),content_type='application/octet-stream',headers={'X-Digest-K':str(digest.k)})
+def aapp():
+    async def opened(_):
+        global asess
+        # keep-alive com os vizinhos, sem limite de conexoes simultaneas (pedidos nao esperam na fila)
+        asess=aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0,keepalive_timeout=POOL_IDLE),
+                                    timeout=aiohttp.ClientTimeout(sock_connect=10,sock_read=10))
+    async def closed(_): await asess.close()
+    a=web.Application(); a.on_startup.append(opened); a.on_cleanup.append(closed)
+    a.add_routes([web.get('/file/{f}',afile),web.post('/replicate/{f}',areplicate),web.get('/health',ahealth),
+                  web.get('/peers',apeers),web.get('/hot',ahot),web.get('/digest',adigest)])
+    return a
+if __name__=='__main__':
+    if MULTI and ASYNC: web.run_app(aapp(),sock=sock)
+    elif MULTI: make_server('127.0.0.1',PORT,app,threaded=True,request_handler=KeepAliveHandler,fd=sock.fileno()).serve_forever()
+    elif ASYNC: web.run_app(aapp(),host='127.0.0.1',port=PORT)
+    else: app.run(port=PORT,request_handler=KeepAliveHandler)  # keep-alive: o pool dos vizinhos reaproveita as conexoes
\ No newline at end of file